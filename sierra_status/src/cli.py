@@ -4,7 +4,11 @@ import sys
 import os
 
 from sierra_status.__version__ import __version__
-from sierra_status.src import usb_handle
+from sierra_status.src.conf import (
+    LOCK_WAIT_TIMEOUT,
+    WATCH_DIRECTORY,
+    WATCH_PORT_PATTERNS,
+)
 
 DEFAULT_BAUDRATE = 115200
 
@@ -37,6 +41,25 @@ def validate_port(port: str) -> None:
         raise ValueError(f"The specified port '{port}' does not exist.")
 
 
+def validate_trace_file(file_name: str) -> None:
+    """
+    Validates that the trace file can be written, before the run starts.
+
+    Args:
+        file_name (str): The path of the trace file.
+
+    Raises:
+        ValueError: If the file or its directory is not writable.
+    """
+    directory = os.path.dirname(os.path.abspath(file_name))
+    if os.path.exists(file_name):
+        writable = os.path.isfile(file_name) and os.access(file_name, os.W_OK)
+    else:
+        writable = os.path.isdir(directory) and os.access(directory, os.W_OK)
+    if not writable:
+        raise ValueError(f"The trace file '{file_name}' cannot be written.")
+
+
 def main() -> None:
     """
     The main entry point for the Sierra Wireless EM9xxx/EM7xxx CLI tool.
@@ -52,8 +75,6 @@ def main() -> None:
         ValueError: If the specified USB port does not exist.
         Exception: If any other error occurs during the execution of the tool.
     """
-    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
     parser = argparse.ArgumentParser(
         description="CLI tool for Sierra Wireless EM9xxx/EM7xxx modules to query status",
         formatter_class=argparse.RawTextHelpFormatter,
@@ -63,8 +84,8 @@ def main() -> None:
     required.add_argument(
         "-p",
         "--port",
-        help="USB port to use (e.g., 'COM1' for Windows or '/dev/ttyUSB2' for Linux)",
-        required=True,
+        help="USB port to use (e.g., 'COM1' for Windows or '/dev/ttyUSB2' for Linux),\n"
+        "not needed with --watch",
     )
 
     optional = parser.add_argument_group("optional arguments")
@@ -77,7 +98,8 @@ def main() -> None:
     optional.add_argument(
         "-m",
         "--model",
-        help="Model of the device to add to filename (e.g., EM9191 or EM7455)",
+        help="Model of the device to add to filename and select the command set\n"
+        "(e.g., EM9191, EM7455, WP7607 or HL78xx); detected from ATI when omitted",
         default="",
     )
     optional.add_argument(
@@ -99,13 +121,93 @@ def main() -> None:
         help="Enter interactive mode to send custom AT commands",
         action="store_true",
     )
+    optional.add_argument(
+        "-w",
+        "--watch",
+        help="Watch for newly plugged modules and collect the status of each one",
+        action="store_true",
+    )
+    optional.add_argument(
+        "--watch-dir",
+        help=f"Directory to watch for new ports (default: {WATCH_DIRECTORY})",
+        default=WATCH_DIRECTORY,
+    )
+    optional.add_argument(
+        "--watch-pattern",
+        help=f"Port name pattern to accept, may be repeated\n"
+        f"(default: {' '.join(WATCH_PORT_PATTERNS)})",
+        action="append",
+    )
+    optional.add_argument(
+        "-f",
+        "--fast-baudrate",
+        help="Temporarily switch the module and host to the fastest baud rate\n"
+        "reported by AT+IPR=? and restore the original rate at the end",
+        action="store_true",
+    )
+    optional.add_argument(
+        "--cmux",
+        help="Multiplex the port with 3GPP 27.010 CMUX so the network search\n"
+        "runs in parallel with the status sweep",
+        action="store_true",
+    )
+    optional.add_argument(
+        "--lock-wait",
+        help="Seconds to wait in line when another process is using the port\n"
+        f"(default: {LOCK_WAIT_TIMEOUT}, 0 to fail at once)",
+        default=LOCK_WAIT_TIMEOUT,
+        type=float,
+    )
+    optional.add_argument(
+        "--trace",
+        help="Write a Chrome/Perfetto trace of the run to this file",
+        metavar="FILE",
+    )
 
     args = parser.parse_args()
+    if not args.port and not args.watch:
+        parser.error("the following arguments are required: -p/--port")
+    if args.watch and args.port:
+        parser.error("-p/--port cannot be used with -w/--watch")
+    if args.watch and args.interactive:
+        parser.error("-i/--interactive cannot be used with -w/--watch")
+    if args.trace:
+        try:
+            validate_trace_file(args.trace)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.cmux and args.interactive:
+        parser.error("--cmux cannot be used with -i/--interactive")
+    if args.fast_baudrate and args.interactive:
+        parser.error("-f/--fast-baudrate cannot be used with -i/--interactive")
 
     setup_logging(args.verbose)
+    # Subsystems are imported here rather than at module level so that --help,
+    # --version and usage errors do not pay for loading pyserial.
+    if args.trace:
+        from sierra_status.src import tracing
+
+        tracing.enable()
 
     try:
+        if args.watch:
+            from sierra_status.src import hotplug
+
+            hotplug.watch_ports(
+                args.watch_dir,
+                args.model.lower(),
+                logging.getLogger().level,
+                args.search,
+                args.baudrate,
+                args.watch_pattern,
+                lock_wait=args.lock_wait,
+                cmux=args.cmux,
+                negotiate_baudrate=args.fast_baudrate,
+            )
+            return
         validate_port(args.port)
+        from sierra_status.src import usb_handle
+
         usb_handle.start_process(
             args.port,
             args.model.lower(),
@@ -113,10 +215,20 @@ def main() -> None:
             args.search,
             args.baudrate,
             args.interactive,
+            cmux=args.cmux,
+            negotiate_baudrate=args.fast_baudrate,
+            lock_wait=args.lock_wait,
         )
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
         sys.exit(1)
+    finally:
+        if args.trace:
+            try:
+                tracing.write_trace(args.trace)
+                logging.info(f"Trace written to {args.trace}")
+            except OSError as e:
+                logging.error(f"Could not write the trace file: {e}")
 
 
 if __name__ == "__main__":
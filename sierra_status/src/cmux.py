@@ -0,0 +1,451 @@
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import serial
+
+from sierra_status.src import tracing, usb_handle
+from sierra_status.src.conf import (
+    AT_COMMAND_COPS,
+    CMUX_COMMAND,
+    CMUX_FRAME_SIZE,
+    CMUX_SETUP_TIMEOUT,
+    COPS_TIMEOUT,
+    DEFAULT_BAUDRATE,
+    DEFAULT_TIMEOUT,
+)
+
+# 3GPP TS 27.010 basic option framing.
+FLAG = 0xF9
+SABM = 0x2F
+UA = 0x63
+DM = 0x0F
+DISC = 0x43
+UIH = 0xEF
+PF = 0x10
+CONTROL_DLCI = 0
+# Control channel message types, with the EA bit and the C/R bit of a command.
+MSG_CLD = 0xC3
+MSG_MSC = 0xE3
+MSG_CR = 0x02
+# V.24 signals sent with MSC: EA, RTC, RTR and DV.
+MSC_SIGNALS = 0x8D
+
+FINAL_RESPONSE = re.compile(r"^(OK|ERROR|\+CM[ES] ERROR:[^\r\n]*)\r?\n", re.MULTILINE)
+
+
+def _make_crc_table() -> List[int]:
+    table = []
+    for value in range(256):
+        crc = value
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xE0 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+CRC_TABLE = _make_crc_table()
+FCS_GOOD = 0xCF
+
+
+def _crc(data: bytes) -> int:
+    crc = 0xFF
+    for byte in data:
+        crc = CRC_TABLE[crc ^ byte]
+    return crc
+
+
+class CmuxError(serial.SerialException):
+    """
+    Raised when the multiplexer cannot be started or a channel cannot be opened.
+    """
+
+
+def encode_frame(
+    dlci: int, control: int, data: bytes = b"", command: bool = True
+) -> bytes:
+    """
+    Builds a basic option CMUX frame.
+
+    Args:
+        dlci (int): The data link connection identifier, 0 for the control channel.
+        control (int): The frame type, e.g. SABM or UIH, including the P/F bit.
+        data (bytes, optional): The information field.
+        command (bool, optional): Sets the C/R bit as the initiator of a command.
+
+    Returns:
+        bytes: The frame including the opening and closing flags.
+    """
+    address = (dlci << 2) | (0x02 if command else 0) | 0x01
+    if len(data) <= 127:
+        length = bytes([(len(data) << 1) | 0x01])
+    else:
+        length = bytes([(len(data) << 1) & 0xFE, len(data) >> 7])
+    header = bytes([address, control]) + length
+    return bytes([FLAG]) + header + data + bytes([0xFF - _crc(header), FLAG])
+
+
+class FrameDecoder:
+    """
+    Splits a byte stream into CMUX frames, skipping corrupt data.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        """
+        Adds received bytes and returns the frames completed by them.
+
+        Args:
+            data (bytes): The bytes read from the port.
+
+        Returns:
+            List[Tuple[int, int, bytes]]: (dlci, control without P/F bit, information) per frame.
+        """
+        self._buffer += data
+        frames = []
+        while True:
+            start = self._buffer.find(FLAG)
+            if start < 0:
+                self._buffer.clear()
+                return frames
+            del self._buffer[:start]
+            while len(self._buffer) > 1 and self._buffer[1] == FLAG:
+                del self._buffer[0]
+            if len(self._buffer) < 4:
+                return frames
+            if self._buffer[3] & 0x01:
+                header_size, length = 3, self._buffer[3] >> 1
+            elif len(self._buffer) < 5:
+                return frames
+            else:
+                header_size = 4
+                length = (self._buffer[3] >> 1) | (self._buffer[4] << 7)
+            end = 1 + header_size + length
+            if len(self._buffer) < end + 2:
+                return frames
+            header = bytes(self._buffer[1 : 1 + header_size])
+            fcs = self._buffer[end]
+            if self._buffer[end + 1] != FLAG or _crc(header + bytes([fcs])) != FCS_GOOD:
+                logging.debug("Dropping corrupt CMUX frame")
+                del self._buffer[0]
+                continue
+            frames.append(
+                (
+                    header[0] >> 2,
+                    header[1] & ~PF,
+                    bytes(self._buffer[1 + header_size : end]),
+                )
+            )
+            # The closing flag may also open the next frame.
+            del self._buffer[: end + 1]
+
+
+class CmuxChannel:
+    """
+    A virtual AT command channel running over a CMUX session.
+
+    Data received while no command is pending is kept as unsolicited result codes.
+    """
+
+    def __init__(self, session: "CmuxSession", dlci: int) -> None:
+        self.session = session
+        self.dlci = dlci
+        self._condition = threading.Condition()
+        self._command_lock = threading.Lock()
+        self._pending = False
+        self._response = ""
+        self._unsolicited = ""
+
+    def send_command(self, command: str, timeout: float = DEFAULT_TIMEOUT) -> str:
+        """
+        Sends an AT command on this channel and returns the response.
+
+        Args:
+            command (str): The AT command to send.
+            timeout (float, optional): The maximum time to wait for a response, in seconds.
+
+        Returns:
+            str: The response, with each line stripped of leading/trailing whitespace.
+        """
+        with self._command_lock, tracing.span(
+            "cmux_command", dlci=self.dlci, command=command
+        ):
+            with self._condition:
+                self._pending = True
+                self._response = ""
+            logging.debug(f"Sending command on DLC {self.dlci}: {command}")
+            self.session.write_data(self.dlci, f"{command}\r\n".encode("utf-8"))
+            deadline = time.time() + timeout
+            with self._condition:
+                while not FINAL_RESPONSE.search(self._response):
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        logging.error(
+                            f"Timeout waiting for {command} on DLC {self.dlci}"
+                        )
+                        break
+                    self._condition.wait(remaining)
+                self._pending = False
+                result = self._response
+        return "\n".join(line.strip() for line in result.splitlines() if line.strip())
+
+    def read_unsolicited(self) -> List[str]:
+        """
+        Returns and clears the unsolicited lines received on this channel.
+
+        Returns:
+            List[str]: The non-empty lines, in the order they were received.
+        """
+        with self._condition:
+            lines = [line.strip() for line in self._unsolicited.splitlines()]
+            self._unsolicited = ""
+        return [line for line in lines if line]
+
+    def receive(self, data: bytes) -> None:
+        """
+        Handles data the module sent on this channel.
+
+        Args:
+            data (bytes): The information field of a UIH frame.
+        """
+        text = data.decode("utf-8", errors="replace")
+        with self._condition:
+            if self._pending:
+                self._response += text
+                self._condition.notify_all()
+            else:
+                self._unsolicited += text
+
+
+class CmuxSession:
+    """
+    Runs several virtual AT channels over one serial port using 3GPP TS 27.010.
+
+    The module is switched to multiplexer mode with AT+CMUX=0 and returns to
+    normal AT mode when the session is closed.
+    """
+
+    def __init__(
+        self, port: str, baudrate: int = DEFAULT_BAUDRATE, channels: int = 2
+    ) -> None:
+        self.port = port
+        self.baudrate = baudrate
+        self.channel_count = channels
+        self.channels: Dict[int, CmuxChannel] = {}
+        self._serial: Optional[serial.Serial] = None
+        self._decoder = FrameDecoder()
+        self._write_lock = threading.Lock()
+        self._replies: Dict[int, int] = {}
+        self._reply_events: Dict[int, threading.Event] = {}
+        self._running = threading.Event()
+        self._reader: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "CmuxSession":
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def open(self) -> None:
+        """
+        Starts the multiplexer and opens the control channel and the data channels.
+
+        Raises:
+            CmuxError: If the module rejects AT+CMUX or a channel cannot be opened.
+        """
+        with tracing.span("cmux_open", port=self.port):
+            self._serial = serial.Serial(self.port, self.baudrate, timeout=0.1)
+            try:
+                self._start_multiplexer()
+                self._running.set()
+                self._reader = threading.Thread(
+                    target=self._read_loop, name=f"cmux-{self.port}", daemon=True
+                )
+                self._reader.start()
+                for dlci in range(self.channel_count + 1):
+                    if dlci != CONTROL_DLCI:
+                        self.channels[dlci] = CmuxChannel(self, dlci)
+                    self._establish(dlci)
+                    if dlci != CONTROL_DLCI:
+                        self._send_control(
+                            MSG_MSC, bytes([(dlci << 2) | 0x03, MSC_SIGNALS])
+                        )
+            except Exception:
+                self.close()
+                raise
+
+    def channel(self, dlci: int) -> CmuxChannel:
+        """
+        Returns an open data channel.
+
+        Args:
+            dlci (int): The channel number, from 1 to the number of channels.
+
+        Returns:
+            CmuxChannel: The channel.
+        """
+        return self.channels[dlci]
+
+    def write_data(self, dlci: int, data: bytes) -> None:
+        """
+        Sends data on a channel, split into UIH frames of at most CMUX_FRAME_SIZE bytes.
+
+        Args:
+            dlci (int): The channel number.
+            data (bytes): The data to send.
+        """
+        for offset in range(0, len(data), CMUX_FRAME_SIZE):
+            self._write(
+                encode_frame(dlci, UIH, data[offset : offset + CMUX_FRAME_SIZE])
+            )
+
+    def close(self) -> None:
+        """
+        Closes the channels and returns the module to normal AT mode.
+        """
+        if self._serial is None:
+            return
+        if self._running.is_set():
+            for dlci in sorted(self.channels, reverse=True):
+                self._request(dlci, DISC | PF, CMUX_SETUP_TIMEOUT)
+            self._send_control(MSG_CLD, b"")
+            time.sleep(0.1)
+            self._running.clear()
+        if self._reader is not None:
+            self._reader.join()
+            self._reader = None
+        self._serial.close()
+        self._serial = None
+        self.channels.clear()
+
+    def _start_multiplexer(self) -> None:
+        self._serial.reset_input_buffer()
+        self._serial.write(f"{CMUX_COMMAND}\r\n".encode("utf-8"))
+        response = b""
+        deadline = time.time() + CMUX_SETUP_TIMEOUT
+        while time.time() < deadline:
+            response += self._serial.read(64)
+            if b"OK\r\n" in response:
+                return
+            if b"ERROR" in response:
+                break
+        raise CmuxError(f"Module on {self.port} did not accept {CMUX_COMMAND}")
+
+    def _establish(self, dlci: int) -> None:
+        if self._request(dlci, SABM | PF, CMUX_SETUP_TIMEOUT) != UA:
+            raise CmuxError(f"Module on {self.port} refused to open DLC {dlci}")
+
+    def _request(self, dlci: int, control: int, timeout: float) -> Optional[int]:
+        event = threading.Event()
+        self._reply_events[dlci] = event
+        self._replies.pop(dlci, None)
+        self._write(encode_frame(dlci, control))
+        event.wait(timeout)
+        self._reply_events.pop(dlci, None)
+        return self._replies.pop(dlci, None)
+
+    def _send_control(self, message_type: int, values: bytes) -> None:
+        data = bytes([message_type, (len(values) << 1) | 0x01]) + values
+        self._write(encode_frame(CONTROL_DLCI, UIH, data))
+
+    def _write(self, frame: bytes) -> None:
+        with self._write_lock:
+            self._serial.write(frame)
+
+    def _read_loop(self) -> None:
+        while self._running.is_set():
+            try:
+                data = self._serial.read(self._serial.in_waiting or 1)
+            except (serial.SerialException, OSError) as e:
+                logging.error(f"CMUX read error on {self.port}: {e}")
+                break
+            for dlci, control, info in self._decoder.feed(data):
+                self._dispatch(dlci, control, info)
+
+    def _dispatch(self, dlci: int, control: int, info: bytes) -> None:
+        if control in (UA, DM):
+            self._replies[dlci] = control
+            event = self._reply_events.get(dlci)
+            if event is not None:
+                event.set()
+        elif control == UIH and dlci == CONTROL_DLCI:
+            # Acknowledge MSC commands from the module, ignore everything else.
+            if info and info[0] == MSG_MSC:
+                self._write(
+                    encode_frame(
+                        CONTROL_DLCI, UIH, bytes([MSG_MSC & ~MSG_CR]) + info[1:]
+                    )
+                )
+        elif control == UIH and dlci in self.channels:
+            self.channels[dlci].receive(info)
+
+
+def get_module_status_cmux(
+    port: str, search: int, model: str, baudrate: int = DEFAULT_BAUDRATE
+) -> str:
+    """
+    Retrieves the status of a module over CMUX, running the network search in parallel.
+
+    The status sweep runs on DLC 1 while AT+COPS=? runs on DLC 2, so the long
+    network search no longer blocks the other queries. Unsolicited result codes
+    received on either channel are appended to the result. If the module does
+    not support CMUX, the status is collected with plain AT commands instead.
+
+    Args:
+        port (str): The serial port to use.
+        search (int): A flag indicating whether to run the network search.
+        model (str): The model of the module, empty to detect it from ATI.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+
+    Returns:
+        str: The status information retrieved from the module.
+    """
+    session = CmuxSession(port, baudrate, channels=2 if search else 1)
+    try:
+        session.open()
+    except CmuxError as e:
+        logging.warning(f"{e}, falling back to plain AT commands")
+        return usb_handle.get_module_status(port, search, model, baudrate)
+
+    result = ""
+    try:
+        scan_result: List[str] = []
+        scanner = None
+        if search:
+            logging.info(f"Sending command: {AT_COMMAND_COPS} on DLC 2")
+            scanner = threading.Thread(
+                target=lambda: scan_result.append(
+                    session.channel(2).send_command(AT_COMMAND_COPS, COPS_TIMEOUT)
+                ),
+                name=f"cmux-cops-{port}",
+                daemon=True,
+            )
+            scanner.start()
+
+        result = "\n\n".join(
+            item.response
+            for item in usb_handle.iter_status(
+                port, model or None, baudrate, send=session.channel(1).send_command
+            )
+        )
+
+        if scanner is not None:
+            scanner.join()
+            result += f"\n\n{''.join(scan_result)}"
+        unsolicited = [
+            line
+            for channel in session.channels.values()
+            for line in channel.read_unsolicited()
+        ]
+        if unsolicited:
+            result += "\n\n=== Unsolicited result codes ===\n" + "\n".join(unsolicited)
+    except Exception as e:
+        logging.error(f"Error getting module status over CMUX: {e}")
+    finally:
+        session.close()
+    return result
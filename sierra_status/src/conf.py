@@ -1,3 +1,5 @@
+import os
+
 AT_COMMANDS = [
     "ATI",
     "AT+CMEE=1",
@@ -65,8 +67,84 @@ AT_COMMANDS_HL78 = [
     "AT+COPS?",
 ]
 
+AT_COMMANDS_WP76 = [
+    "ATI",
+    "AT+CMEE=1",
+    "AT!PRIID?",
+    "AT!IMAGE?",
+    "ATI8",
+    "AT!GSTATUS?",
+    "AT+CPIN?",
+    "AT+CIMI",
+    "AT!CUSTOM?",
+    "AT+CREG?",
+    "AT+CGREG?",
+    "AT+CEREG?",
+    "AT+CGPADDR=1",
+    "AT!SELRAT?",
+    "AT+CGDCONT?",
+    "AT!UIMS?",
+    "AT!IMPREF?",
+    'AT!ENTERCND="A710"',
+    "AT!BAND?",
+    "AT!HWID?",
+    "AT!USBCOMP?",
+    "AT!MAPUART?",
+    "AT!LTEINFO?",
+    "AT+COPS?",
+]
+
 AT_COMMAND_COPS = "AT+COPS=?"
+COPS_TIMEOUT = 120
+
+# Command profile per module family.
+PROFILE_COMMANDS = {
+    "em": AT_COMMANDS,
+    "hl78xx": AT_COMMANDS_HL78,
+    "wp76xx": AT_COMMANDS_WP76,
+}
+# Model name prefixes, as reported by ATI or given with -m, and their family.
+MODEL_FAMILIES = {
+    "HL78": "hl78xx",
+    "WP76": "wp76xx",
+    "WP77": "wp76xx",
+    "EM": "em",
+    "MC": "em",
+}
+DEFAULT_PROFILE = "em"
+PROFILE_CACHE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "sierra_status",
+    "profiles.json",
+)
 
 DEFAULT_TIMEOUT = 60
 DEFAULT_BAUDRATE = 115200
+STANDARD_BAUDRATES = [
+    9600,
+    19200,
+    38400,
+    57600,
+    115200,
+    230400,
+    460800,
+    921600,
+    1000000,
+    2000000,
+    3000000,
+    4000000,
+]
+BAUDRATE_SWITCH_TIMEOUT = 2
+BAUDRATE_MAX_ATTEMPTS = 3
+LOCK_DIRECTORY = "/var/lock"
+LOCK_WAIT_TIMEOUT = 120
+LOCK_POLL_INTERVAL = 0.2
+CMUX_COMMAND = "AT+CMUX=0"
+CMUX_FRAME_SIZE = 31
+CMUX_SETUP_TIMEOUT = 5
 STATUS_FILE_PATTERN = "status_{model}_{timestamp}.txt"
+
+WATCH_DIRECTORY = "/dev"
+WATCH_PORT_PATTERNS = ["ttyUSB*", "ttyACM*"]
+MODEM_READY_TIMEOUT = 30
+MODEM_PROBE_INTERVAL = 0.5
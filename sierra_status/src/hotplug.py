@@ -0,0 +1,326 @@
+import ctypes
+import ctypes.util
+import fnmatch
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+import serial
+from serial.tools import list_ports
+
+from sierra_status.src import usb_handle
+from sierra_status.src.portlock import port_lock
+from sierra_status.src.conf import (
+    DEFAULT_BAUDRATE,
+    LOCK_WAIT_TIMEOUT,
+    MODEM_PROBE_INTERVAL,
+    MODEM_READY_TIMEOUT,
+    WATCH_PORT_PATTERNS,
+)
+
+IN_CREATE = 0x00000100
+IN_MOVED_TO = 0x00000080
+INOTIFY_EVENT = struct.Struct("iIII")
+
+# USB devices with a collection running on one of their ports.
+_collecting: Set[str] = set()
+_collecting_lock = threading.Lock()
+
+
+def _inotify_open(directory: str) -> Optional[int]:
+    """
+    Opens an inotify descriptor watching the directory for new entries.
+
+    Args:
+        directory (str): The directory to watch.
+
+    Returns:
+        Optional[int]: The inotify file descriptor, or None if inotify is not available.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_CLOEXEC)
+    except (OSError, AttributeError) as e:
+        logging.debug(f"inotify is not available: {e}")
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(directory), IN_CREATE | IN_MOVED_TO) < 0:
+        logging.debug(f"inotify_add_watch failed for {directory}")
+        os.close(fd)
+        return None
+    return fd
+
+
+def _parse_inotify_events(data: bytes) -> List[str]:
+    """
+    Extracts the entry names from a buffer of raw inotify events.
+
+    Args:
+        data (bytes): The buffer read from the inotify file descriptor.
+
+    Returns:
+        List[str]: The names reported by the events, in order.
+    """
+    names = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        name = data[offset : offset + length].rstrip(b"\0")
+        offset += length
+        if name:
+            names.append(os.fsdecode(name))
+    return names
+
+
+class DirectoryWatcher:
+    """
+    Reports entries created in a directory.
+
+    Uses inotify where available and falls back to comparing directory listings.
+    """
+
+    def __init__(self, directory: str) -> None:
+        if not os.path.isdir(directory):
+            raise ValueError(f"The watch directory '{directory}' does not exist.")
+        self.directory = directory
+        self._known = set(os.listdir(directory))
+        self._fd = _inotify_open(directory)
+        if self._fd is None:
+            logging.debug(f"Polling {directory} for new entries")
+
+    def read_events(self, timeout: float) -> List[str]:
+        """
+        Waits up to timeout seconds and returns the names of newly created entries.
+
+        Args:
+            timeout (float): The maximum time to wait for an event, in seconds.
+
+        Returns:
+            List[str]: The names of the new entries, empty if none appeared.
+        """
+        if self._fd is None:
+            time.sleep(timeout)
+            current = set(os.listdir(self.directory))
+            new_entries = sorted(current - self._known)
+            self._known = current
+            return new_entries
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        return _parse_inotify_events(os.read(self._fd, 4096))
+
+    def close(self) -> None:
+        """
+        Releases the inotify file descriptor, if any.
+        """
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def is_candidate_port(name: str, patterns: List[str]) -> bool:
+    """
+    Checks whether a directory entry looks like an AT-capable serial port.
+
+    Args:
+        name (str): The entry name, without directory.
+        patterns (List[str]): Shell-style patterns of accepted port names.
+
+    Returns:
+        bool: True if the name matches one of the patterns.
+    """
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+
+def usb_device_path(port: str) -> Optional[str]:
+    """
+    Looks up the USB device a serial port belongs to.
+
+    Args:
+        port (str): The serial port.
+
+    Returns:
+        Optional[str]: The USB bus path of the device, e.g. 1-1.2, or None for non-USB ports.
+    """
+    real_port = os.path.realpath(port)
+    for entry in list_ports.comports():
+        if entry.device in (port, real_port) and entry.location:
+            return entry.location.split(":")[0]
+    return None
+
+
+def wait_for_modem(
+    port: str,
+    timeout: float = MODEM_READY_TIMEOUT,
+    baudrate: int = DEFAULT_BAUDRATE,
+) -> bool:
+    """
+    Sends AT to the port until the modem answers OK or the timeout expires.
+
+    Args:
+        port (str): The serial port to probe.
+        timeout (float, optional): The maximum time to wait for the modem, in seconds.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+
+    Returns:
+        bool: True if the modem answered OK, False otherwise.
+    """
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with serial.Serial(port, baudrate, timeout=MODEM_PROBE_INTERVAL) as console:
+                console.reset_input_buffer()
+                console.write(b"AT\r\n")
+                if b"OK" in console.read_until(b"OK\r\n"):
+                    return True
+        except (serial.SerialException, OSError) as e:
+            logging.debug(f"Port {port} not ready yet: {e}")
+        time.sleep(MODEM_PROBE_INTERVAL)
+    return False
+
+
+def collect_device(
+    port: str,
+    model: str,
+    log_level: int,
+    search: int,
+    baudrate: int = DEFAULT_BAUDRATE,
+    ready_timeout: float = MODEM_READY_TIMEOUT,
+    lock_wait: float = LOCK_WAIT_TIMEOUT,
+    cmux: bool = False,
+    negotiate_baudrate: bool = False,
+) -> None:
+    """
+    Waits for the modem on a new port and runs a status collection for it.
+
+    The port is locked for the readiness probe and the collection together, so
+    no other process writes to it in between. Ports that never answer AT, such
+    as the DM and NMEA ports of a module, are skipped. Only the first AT port
+    of a USB device to answer is collected.
+
+    Args:
+        port (str): The serial port that appeared.
+        model (str): The model of the module.
+        log_level (int): The logging level to use.
+        search (int): The search parameter to use.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+        ready_timeout (float, optional): The maximum time to wait for the modem, in seconds.
+        lock_wait (float, optional): The maximum time to wait for the port lock, in seconds.
+        cmux (bool, optional): Run the sweep and the network search in parallel over CMUX.
+        negotiate_baudrate (bool, optional): Temporarily switch to the fastest baud rate the module supports.
+    """
+    try:
+        with port_lock(port, lock_wait):
+            if not wait_for_modem(port, ready_timeout, baudrate):
+                logging.info(
+                    f"{port} did not answer AT within {ready_timeout}s, skipping it"
+                )
+                return
+            device = usb_device_path(port)
+            with _collecting_lock:
+                if device in _collecting:
+                    logging.info(
+                        f"Skipping {port}, USB device {device} is already collected"
+                    )
+                    return
+                if device is not None:
+                    _collecting.add(device)
+            try:
+                usb_handle.start_process(
+                    port,
+                    model,
+                    log_level,
+                    search,
+                    baudrate,
+                    file_tag=os.path.basename(port),
+                    cmux=cmux,
+                    negotiate_baudrate=negotiate_baudrate,
+                )
+            finally:
+                with _collecting_lock:
+                    _collecting.discard(device)
+    except OSError as e:
+        # Covers SerialException and lock file permission errors.
+        logging.error(f"Could not collect the status of {port}: {e}")
+
+
+def watch_ports(
+    directory: str,
+    model: str,
+    log_level: int,
+    search: int,
+    baudrate: int = DEFAULT_BAUDRATE,
+    patterns: Optional[List[str]] = None,
+    ready_timeout: float = MODEM_READY_TIMEOUT,
+    stop_event: Optional[threading.Event] = None,
+    lock_wait: float = LOCK_WAIT_TIMEOUT,
+    cmux: bool = False,
+    negotiate_baudrate: bool = False,
+) -> None:
+    """
+    Watches a directory for new serial ports and collects the status of each new device.
+
+    Every new port is handled in its own thread, so several devices are collected
+    concurrently. A port is picked up again once its previous collection finished.
+
+    Args:
+        directory (str): The directory to watch, normally /dev.
+        model (str): The model of the modules.
+        log_level (int): The logging level to use.
+        search (int): The search parameter to use.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+        patterns (List[str], optional): Port name patterns. Defaults to WATCH_PORT_PATTERNS.
+        ready_timeout (float, optional): The maximum time to wait for each modem, in seconds.
+        stop_event (threading.Event, optional): Stops watching when set.
+        lock_wait (float, optional): The maximum time to wait for each port lock, in seconds.
+        cmux (bool, optional): Run the sweep and the network search in parallel over CMUX.
+        negotiate_baudrate (bool, optional): Temporarily switch to the fastest baud rate the module supports.
+    """
+    patterns = patterns or WATCH_PORT_PATTERNS
+    stop_event = stop_event or threading.Event()
+    watcher = DirectoryWatcher(directory)
+    workers: Dict[str, threading.Thread] = {}
+    logging.info(f"Watching {directory} for new ports matching {', '.join(patterns)}")
+    try:
+        while not stop_event.is_set():
+            for name in watcher.read_events(MODEM_PROBE_INTERVAL):
+                if not is_candidate_port(name, patterns):
+                    continue
+                port = os.path.join(directory, name)
+                worker = workers.get(port)
+                if worker is not None and worker.is_alive():
+                    continue
+                logging.info(f"New port detected: {port}")
+                worker = threading.Thread(
+                    target=collect_device,
+                    args=(
+                        port,
+                        model,
+                        log_level,
+                        search,
+                        baudrate,
+                        ready_timeout,
+                        lock_wait,
+                        cmux,
+                        negotiate_baudrate,
+                    ),
+                    name=f"collect-{name}",
+                    daemon=True,
+                )
+                workers[port] = worker
+                worker.start()
+    except KeyboardInterrupt:
+        logging.info("Stopping watch mode")
+    finally:
+        watcher.close()
+        for worker in workers.values():
+            worker.join()
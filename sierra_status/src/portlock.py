@@ -0,0 +1,193 @@
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import serial
+
+from sierra_status.src.conf import (
+    LOCK_DIRECTORY,
+    LOCK_POLL_INTERVAL,
+    LOCK_WAIT_TIMEOUT,
+)
+
+
+class PortLockError(serial.SerialException):
+    """
+    Raised when a port is still locked by another process after the wait timeout.
+    """
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_pid(path: str) -> Optional[int]:
+    try:
+        with open(path) as f:
+            return int(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def lock_directory(directory: str = LOCK_DIRECTORY) -> str:
+    """
+    Returns the directory for lock files, falling back to the temp directory.
+
+    Args:
+        directory (str, optional): The preferred directory. Defaults to LOCK_DIRECTORY.
+
+    Returns:
+        str: The directory if it is writable, otherwise the system temp directory.
+    """
+    if os.path.isdir(directory) and os.access(directory, os.W_OK):
+        return directory
+    logging.warning(
+        f"{directory} is not writable, using {tempfile.gettempdir()} for lock "
+        "files; other serial tools will not see them"
+    )
+    return tempfile.gettempdir()
+
+
+def _make_shared_dir(path: str) -> None:
+    # Sticky and world-writable like /var/lock itself, so every user can queue.
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        return
+    os.chmod(path, 0o1777)
+
+
+def _try_lock(lock_file: str) -> bool:
+    try:
+        fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+    except FileExistsError:
+        pid = _read_pid(lock_file)
+        if pid is None or _pid_alive(pid):
+            return False
+        logging.info(f"Removing stale lock {lock_file} of PID {pid}")
+        try:
+            os.remove(lock_file)
+        except FileNotFoundError:
+            pass
+        except PermissionError as e:
+            logging.debug(f"Cannot remove stale lock {lock_file}: {e}")
+            return False
+        return _try_lock(lock_file)
+    with os.fdopen(fd, "w") as f:
+        f.write(f"{os.getpid():10d}\n")
+    return True
+
+
+def _live_tickets(queue_dir: str) -> List[str]:
+    tickets = []
+    for ticket in sorted(os.listdir(queue_dir)):
+        pid = _read_pid(os.path.join(queue_dir, ticket))
+        if pid is not None and not _pid_alive(pid):
+            try:
+                os.remove(os.path.join(queue_dir, ticket))
+            except FileNotFoundError:
+                pass
+            except PermissionError as e:
+                logging.debug(f"Cannot remove stale ticket {ticket}: {e}")
+            continue
+        tickets.append(ticket)
+    return tickets
+
+
+@contextmanager
+def port_lock(
+    port: str,
+    wait: float = LOCK_WAIT_TIMEOUT,
+    directory: str = LOCK_DIRECTORY,
+) -> Iterator[None]:
+    """
+    Holds the UUCP lock file of a port, waiting for it in FIFO order.
+
+    The lock is a LCK..<name> file holding the owner PID, as used by other
+    serial tools. Locks of processes that no longer exist are removed, or count
+    as held if they belong to another user and cannot be removed. Waiters
+    queue with ticket files so the port is handed over in arrival order.
+    Locking is skipped on systems without the UUCP convention, e.g. Windows.
+
+    Args:
+        port (str): The serial port to lock.
+        wait (float, optional): The maximum time to wait for the lock, in seconds.
+        directory (str, optional): The lock directory. Defaults to LOCK_DIRECTORY.
+
+    Raises:
+        PortLockError: If the port is still locked after waiting.
+    """
+    if os.name != "posix":
+        yield
+        return
+
+    directory = lock_directory(directory)
+    name = os.path.basename(os.path.realpath(port))
+    lock_file = os.path.join(directory, f"LCK..{name}")
+    queue_dir = os.path.join(directory, "sierra_status", name)
+    ticket = f"{time.time_ns():020d}.{os.getpid()}.{threading.get_ident()}"
+    while True:
+        _make_shared_dir(os.path.dirname(queue_dir))
+        _make_shared_dir(queue_dir)
+        try:
+            with open(os.path.join(queue_dir, ticket), "w") as f:
+                f.write(f"{os.getpid():10d}\n")
+            break
+        except FileNotFoundError:
+            # A finishing run removed the empty queue directory in between.
+            continue
+
+    deadline = time.time() + wait
+    last_position = None
+    try:
+        while True:
+            tickets = _live_tickets(queue_dir)
+            position = tickets.index(ticket)
+            if position == 0 and _try_lock(lock_file):
+                break
+            owner = _read_pid(lock_file)
+            # At the head of the queue a dead owner means its lock could not be removed.
+            stale = position == 0 and owner is not None and not _pid_alive(owner)
+            if stale and position != last_position:
+                logging.warning(
+                    f"Lock {lock_file} of exited PID {owner} cannot be removed"
+                )
+            if time.time() >= deadline:
+                raise PortLockError(
+                    f"Port {port} is locked by PID {owner}, gave up after {wait}s "
+                    f"at queue position {position + 1}"
+                )
+            if position != last_position:
+                logging.info(
+                    f"Port {port} is locked by PID {owner}, "
+                    f"waiting at queue position {position + 1}"
+                )
+                last_position = position
+            time.sleep(LOCK_POLL_INTERVAL)
+    finally:
+        try:
+            os.remove(os.path.join(queue_dir, ticket))
+        except FileNotFoundError:
+            pass
+        try:
+            os.rmdir(queue_dir)
+        except OSError:
+            # Other processes are still waiting for the port.
+            pass
+
+    logging.debug(f"Locked {port} with {lock_file}")
+    try:
+        yield
+    finally:
+        if _read_pid(lock_file) == os.getpid():
+            os.remove(lock_file)
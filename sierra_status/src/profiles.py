@@ -0,0 +1,155 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional
+
+from sierra_status.src.conf import MODEL_FAMILIES, PROFILE_CACHE_FILE, PROFILE_COMMANDS
+
+ATI_FIELDS = {
+    "model": re.compile(r"^Model:\s*(\S+)", re.MULTILINE),
+    "firmware": re.compile(r"^Revision:\s*(.+)$", re.MULTILINE),
+    "serial": re.compile(r"^(?:FSN|IMEI):\s*(\S+)", re.MULTILINE),
+}
+BARE_MODEL_LINE = re.compile(
+    r"^((?:%s)\w*)$" % "|".join(MODEL_FAMILIES), re.MULTILINE | re.IGNORECASE
+)
+
+_cache_lock = threading.Lock()
+
+
+def family_for_model(model: str) -> Optional[str]:
+    """
+    Maps a model name to its module family.
+
+    Args:
+        model (str): The model name, e.g. EM9191, hl78xx or WP7607.
+
+    Returns:
+        Optional[str]: The family name, or None if the model is not recognized.
+    """
+    model = model.upper()
+    for prefix, family in MODEL_FAMILIES.items():
+        if model.startswith(prefix):
+            return family
+    return None
+
+
+def load_profile(family: str) -> List[str]:
+    """
+    Loads the AT command list of a module family.
+
+    Args:
+        family (str): The family name, one of PROFILE_COMMANDS.
+
+    Returns:
+        List[str]: The AT commands to send for this family.
+
+    Raises:
+        ValueError: If the family has no profile.
+    """
+    if family not in PROFILE_COMMANDS:
+        raise ValueError(f"Unknown command profile '{family}'")
+    return PROFILE_COMMANDS[family]
+
+
+def parse_ati(reply: str) -> Dict[str, str]:
+    """
+    Extracts the model, firmware and serial number from an ATI reply.
+
+    EM/WP modules answer with "Model:", "Revision:" and "FSN:"/"IMEI:" lines,
+    while HL78 modules answer with the bare model name.
+
+    Args:
+        reply (str): The ATI reply.
+
+    Returns:
+        Dict[str, str]: The fields that were found.
+    """
+    info = {}
+    for field, pattern in ATI_FIELDS.items():
+        match = pattern.search(reply)
+        if match:
+            info[field] = match.group(1).strip()
+    if "model" not in info:
+        match = BARE_MODEL_LINE.search(reply)
+        if match:
+            info["model"] = match.group(1)
+    return info
+
+
+def usb_serial_number(port: str) -> Optional[str]:
+    """
+    Looks up the USB serial number of the device behind a serial port.
+
+    Args:
+        port (str): The serial port.
+
+    Returns:
+        Optional[str]: The USB serial number, or None for non-USB ports.
+    """
+    from serial.tools import list_ports
+
+    real_port = os.path.realpath(port)
+    for entry in list_ports.comports():
+        if entry.device in (port, real_port):
+            return entry.serial_number or None
+    return None
+
+
+def _load_cache(cache_file: str) -> Dict[str, Dict[str, str]]:
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.debug(f"Ignoring unreadable profile cache {cache_file}: {e}")
+        return {}
+
+
+def get_cached_profile(
+    device_serial: str, cache_file: str = PROFILE_CACHE_FILE
+) -> Optional[str]:
+    """
+    Returns the family detected earlier for a device.
+
+    Args:
+        device_serial (str): The serial number of the device.
+        cache_file (str, optional): The cache file. Defaults to PROFILE_CACHE_FILE.
+
+    Returns:
+        Optional[str]: The cached family, or None if the device is unknown.
+    """
+    with _cache_lock:
+        family = _load_cache(cache_file).get(device_serial, {}).get("profile")
+    return family if family in PROFILE_COMMANDS else None
+
+
+def store_cached_profile(
+    device_serial: str,
+    family: str,
+    info: Dict[str, str],
+    cache_file: str = PROFILE_CACHE_FILE,
+) -> None:
+    """
+    Saves the detected family and module details for a device.
+
+    Args:
+        device_serial (str): The serial number of the device.
+        family (str): The detected family.
+        info (Dict[str, str]): The fields parsed from the ATI reply.
+        cache_file (str, optional): The cache file. Defaults to PROFILE_CACHE_FILE.
+    """
+    with _cache_lock:
+        cache = _load_cache(cache_file)
+        cache[device_serial] = dict(info, profile=family)
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            temp_file = f"{cache_file}.{os.getpid()}.tmp"
+            with open(temp_file, "w") as f:
+                json.dump(cache, f, indent=2, sort_keys=True)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            logging.debug(f"Could not write profile cache {cache_file}: {e}")
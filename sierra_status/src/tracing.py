@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+_events: Optional[List[Dict[str, Any]]] = None
+_thread_names: Dict[int, str] = {}
+_lock = threading.Lock()
+
+
+class _Span:
+    """
+    Records a complete ("X") trace event covering the body of a with block.
+    """
+
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: Dict[str, Any]) -> None:
+        self.name = name
+        self.args = args
+        self.start = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        event = {
+            "name": self.name,
+            "cat": "sierra_status",
+            "ph": "X",
+            "ts": self.start * 1e6,
+            "dur": (end - self.start) * 1e6,
+            "pid": os.getpid(),
+            "tid": thread.ident,
+            "args": self.args,
+        }
+        with _lock:
+            if _events is not None:
+                _events.append(event)
+                _thread_names[thread.ident] = thread.name
+
+
+class _NullSpan:
+    """
+    Does nothing; returned by span() while tracing is disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable() -> None:
+    """
+    Starts recording spans, discarding any previously recorded ones.
+    """
+    global _events
+    with _lock:
+        _events = []
+        _thread_names.clear()
+
+
+def disable() -> None:
+    """
+    Stops recording spans and discards the recorded ones.
+    """
+    global _events
+    with _lock:
+        _events = None
+        _thread_names.clear()
+
+
+def is_enabled() -> bool:
+    """
+    Returns True while spans are being recorded.
+    """
+    return _events is not None
+
+
+def span(name: str, **args: Any) -> Any:
+    """
+    Returns a context manager that records the duration of its block.
+
+    Args:
+        name (str): The span name shown in the trace viewer.
+        **args: Extra values attached to the span, e.g. the port or command.
+
+    Returns:
+        A context manager; a shared no-op one when tracing is disabled.
+    """
+    if _events is None:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def write_trace(file_name: str) -> None:
+    """
+    Writes the recorded spans as Chrome/Perfetto trace-event JSON.
+
+    Args:
+        file_name (str): The path of the trace file to write.
+    """
+    with _lock:
+        events = list(_events or [])
+        thread_names = dict(_thread_names)
+    metadata = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"name": name},
+        }
+        for tid, name in sorted(thread_names.items())
+    ]
+    with open(file_name, "w") as f:
+        json.dump(
+            {"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, indent=1
+        )
@@ -2,13 +2,31 @@ import sys
 import time
 import serial
 import logging
+import re
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import (
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+from sierra_status.src import profiles, tracing
 from sierra_status.src.conf import (
-    AT_COMMANDS,
-    AT_COMMANDS_HL78,
     AT_COMMAND_COPS,
+    BAUDRATE_SWITCH_TIMEOUT,
+    BAUDRATE_MAX_ATTEMPTS,
+    COPS_TIMEOUT,
+    DEFAULT_PROFILE,
     DEFAULT_TIMEOUT,
     DEFAULT_BAUDRATE,
+    PROFILE_COMMANDS,
+    STANDARD_BAUDRATES,
     STATUS_FILE_PATTERN,
 )
 
@@ -29,6 +47,7 @@ def send_at_command(
     command: str,
     timeout: float = DEFAULT_TIMEOUT,
     baudrate: int = DEFAULT_BAUDRATE,
+    spinner: bool = True,
 ) -> str:
     """
     Sends an AT command to the specified serial port and returns the response.
@@ -38,6 +57,7 @@ def send_at_command(
         command (str): The AT command to send.
         timeout (float, optional): The maximum time to wait for a response, in seconds. Defaults to 60.
         baudrate (int, optional): The baud rate to use for the serial connection. Defaults to 115200.
+        spinner (bool, optional): Show a spinner on stdout while waiting. Defaults to True.
 
     Returns:
         str: The response from the AT command, with each line stripped of leading/trailing whitespace.
@@ -49,54 +69,217 @@ def send_at_command(
 
     result = ""
     start_time = time.time()
-    try:
-        with serial.Serial(port, baudrate, timeout=0.5) as console:
-            logging.debug(f"Sending command: {command}")
-            console.write(f"{command}\r\n".encode("utf-8"))
-            while time.time() - start_time < timeout:
-                chunk = console.read(1024).decode("utf-8")
-                result += chunk
-                if "OK\r\n" in result or "ERROR\r\n" in result:
-                    break
-                animate_spinner()
-    except serial.SerialException as e:
-        logging.error(f"Serial communication error: {e}")
-    except ValueError as e:
-        logging.error(f"Value error: {e}")
-    except Exception as e:
-        logging.error(f"Unexpected error: {e}")
-    finally:
-        sys.stdout.write("\r" + " " * 20 + "\r")  # Clear the spinner line
-        sys.stdout.flush()
+    with tracing.span("send_at_command", port=port, command=command):
+        try:
+            with tracing.span("open", port=port):
+                connection = serial.Serial(port, baudrate, timeout=0.5)
+            with connection as console:
+                logging.debug(f"Sending command: {command}")
+                with tracing.span("write", command=command):
+                    console.write(f"{command}\r\n".encode("utf-8"))
+                while time.time() - start_time < timeout:
+                    with tracing.span("read"):
+                        chunk = console.read(1024).decode("utf-8")
+                    result += chunk
+                    if "OK\r\n" in result or "ERROR\r\n" in result:
+                        break
+                    if spinner:
+                        with tracing.span("spinner"):
+                            animate_spinner()
+        except serial.SerialException as e:
+            logging.error(f"Serial communication error: {e}")
+        except ValueError as e:
+            logging.error(f"Value error: {e}")
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+        finally:
+            if spinner:
+                sys.stdout.write("\r" + " " * 20 + "\r")  # Clear the spinner line
+                sys.stdout.flush()
     return "\n".join(line.strip() for line in result.splitlines() if line.strip())
 
 
+# Sends one AT command, e.g. on a CMUX channel, and returns the stripped response.
+SendCommand = Callable[[str, float], str]
+
+
+def detect_profile(
+    port: str,
+    baudrate: int = DEFAULT_BAUDRATE,
+    spinner: bool = True,
+    send: Optional[SendCommand] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Detects the module family from the ATI reply, using the per-device cache when possible.
+
+    Args:
+        port (str): The serial port to use.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+        spinner (bool, optional): Show a spinner on stdout while waiting for ATI.
+        send (Callable[[str, float], str], optional): Sends ATI instead of opening the port.
+
+    Returns:
+        Tuple[str, Optional[str]]: The family and the ATI reply, which is None when
+        the family came from the cache and ATI was not sent.
+    """
+    device_serial = profiles.usb_serial_number(port)
+    if device_serial:
+        family = profiles.get_cached_profile(device_serial)
+        if family:
+            logging.info(f"Using cached {family} profile for device {device_serial}")
+            return family, None
+
+    if send is not None:
+        ati_reply = send("ATI", DEFAULT_TIMEOUT).strip()
+    else:
+        ati_reply = send_at_command(
+            port, "ATI", baudrate=baudrate, spinner=spinner
+        ).strip()
+    info = profiles.parse_ati(ati_reply)
+    family = profiles.family_for_model(info.get("model", ""))
+    if not family:
+        logging.info(f"Could not detect the module model, using {DEFAULT_PROFILE}")
+        return DEFAULT_PROFILE, ati_reply
+
+    logging.info(
+        f"Detected {info['model']} (firmware {info.get('firmware', 'unknown')}), "
+        f"using {family} profile"
+    )
+    if device_serial:
+        profiles.store_cached_profile(device_serial, family, info)
+    return family, ati_reply
+
+
+class CommandResult(NamedTuple):
+    """
+    The response of the module to a single AT command.
+
+    Attributes:
+        command (str): The AT command that was sent.
+        response (str): The response, one stripped line per line received.
+        duration (float): The time the command took, in seconds.
+    """
+
+    command: str
+    response: str
+    duration: float
+
+    @property
+    def ok(self) -> bool:
+        """
+        True if the module answered OK.
+        """
+        return self.response.rsplit("\n", 1)[-1] == "OK"
+
+    @property
+    def error(self) -> bool:
+        """
+        True if the module answered ERROR, +CME ERROR or +CMS ERROR.
+        """
+        last_line = self.response.rsplit("\n", 1)[-1]
+        return last_line == "ERROR" or last_line.startswith(
+            ("+CME ERROR", "+CMS ERROR")
+        )
+
+
+def iter_status(
+    port: str,
+    profile: Union[str, Sequence[str], None] = None,
+    baudrate: int = DEFAULT_BAUDRATE,
+    search: bool = False,
+    stop_event: Optional[threading.Event] = None,
+    spinner: bool = False,
+    send: Optional[SendCommand] = None,
+) -> Iterator[CommandResult]:
+    """
+    Sends the status commands to the module and yields each result as soon as it arrives.
+
+    The caller decides what to do with every result, e.g. write it to a file,
+    forward it to a test framework or stop early by breaking out of the loop.
+    Nothing is written to stdout unless the spinner is enabled.
+
+    Args:
+        port (str): The serial port to use.
+        profile (str or Sequence[str], optional): A profile name (em, hl78xx, wp76xx),
+            a model name, or an explicit list of commands. Detected from ATI when omitted.
+        baudrate (int, optional): The baud rate to use for the serial connection.
+        search (bool, optional): Also run the network search (AT+COPS=?) at the end.
+        stop_event (threading.Event, optional): Stops before the next command when set.
+            It is only checked between commands, so a running command, e.g. the
+            network search, is not interrupted.
+        spinner (bool, optional): Show a spinner on stdout while waiting for each response.
+        send (Callable[[str, float], str], optional): Sends each command and returns the
+            response, e.g. over a CMUX channel. Defaults to send_at_command on the port.
+
+    Yields:
+        CommandResult: The result of each command, in the order they were sent.
+    """
+    if send is None:
+
+        def send(command: str, timeout: float) -> str:
+            return send_at_command(
+                port, command, timeout=timeout, baudrate=baudrate, spinner=spinner
+            )
+
+    if profile is not None and not isinstance(profile, str):
+        commands = list(profile)
+    elif profile:
+        family = profile if profile in PROFILE_COMMANDS else None
+        family = family or profiles.family_for_model(profile) or DEFAULT_PROFILE
+        commands = profiles.load_profile(family)
+    else:
+        start_time = time.time()
+        family, ati_reply = detect_profile(port, baudrate, spinner, send)
+        commands = profiles.load_profile(family)
+        if ati_reply is not None:
+            yield CommandResult("ATI", ati_reply, time.time() - start_time)
+            if commands[0] == "ATI":
+                commands = commands[1:]
+
+    for command in commands:
+        if stop_event is not None and stop_event.is_set():
+            return
+        start_time = time.time()
+        response = send(command, DEFAULT_TIMEOUT).strip()
+        yield CommandResult(command, response, time.time() - start_time)
+
+    if search and not (stop_event is not None and stop_event.is_set()):
+        start_time = time.time()
+        logging.info(f"Sending command: {AT_COMMAND_COPS},wait for finishing")
+        response = send(AT_COMMAND_COPS, COPS_TIMEOUT).strip()
+        yield CommandResult(AT_COMMAND_COPS, response, time.time() - start_time)
+
+
 def get_module_status(
     port: str, search: int, model: str, baudrate: int = 115200
 ) -> str:
     """
     Retrieves the status of an module using AT commands.
 
+    The command profile is chosen from the model name. When no model is given
+    it is detected from the ATI reply, which then also serves as the first
+    response of the sweep.
+
     Args:
         port (str): The serial port to use.
         search (int): A flag indicating whether to retrieve additional status information using the AT+COPS command.
-        model (str): The model of the module.
+        model (str): The model of the module, empty to detect it.
         baudrate (int, optional): The baud rate to use for the serial connection. Defaults to 115200.
 
     Returns:
         str: The status information retrieved from the module.
     """
-    result = ""
-    try:
-        commands = AT_COMMANDS_HL78 if model.lower() == "hl78xx" else AT_COMMANDS
-        result = "\n\n".join(
-            send_at_command(port, command, baudrate=baudrate).strip()
-            for command in commands
-        )
-        if search:
-            result += f"\n\n{get_em_cops(port)}"
-    except Exception as e:
-        logging.error(f"Error getting module status: {e}")
+    with tracing.span("get_module_status", port=port, model=model):
+        result = ""
+        try:
+            result = "\n\n".join(
+                item.response
+                for item in iter_status(port, model or None, baudrate, spinner=True)
+            )
+            if search:
+                result += f"\n\n{get_em_cops(port, baudrate)}"
+        except Exception as e:
+            logging.error(f"Error getting module status: {e}")
     return result
 
 
@@ -115,12 +298,125 @@ def get_em_cops(port: str, baudrate: int = DEFAULT_BAUDRATE) -> str:
     try:
 
         logging.info(f"Sending command: {AT_COMMAND_COPS},wait for finishing")
-        result = "".join(send_at_command(port, AT_COMMAND_COPS, 120, baudrate).strip())
+        result = "".join(
+            send_at_command(port, AT_COMMAND_COPS, COPS_TIMEOUT, baudrate).strip()
+        )
     except Exception as e:
         logging.error(f"Error getting EM9 status: {e}")
     return result
 
 
+def parse_supported_baudrates(response: str) -> List[int]:
+    """
+    Extracts the baud rates listed in an AT+IPR=? response.
+
+    Ranges such as (9600-921600) are expanded to the standard rates they contain.
+    Autobaud (0) is not a rate and is left out.
+
+    Args:
+        response (str): The AT+IPR=? response.
+
+    Returns:
+        List[int]: The supported rates, in ascending order.
+    """
+    match = re.search(r"\+IPR:\s*(.*)", response)
+    if not match:
+        return []
+    rates = set()
+    for low, high in re.findall(r"(\d+)(?:-(\d+))?", match.group(1)):
+        if high:
+            rates.update(
+                rate for rate in STANDARD_BAUDRATES if int(low) <= rate <= int(high)
+            )
+        elif int(low) > 0:
+            rates.add(int(low))
+    return sorted(rates)
+
+
+def _host_supports(port: str, baudrate: int) -> bool:
+    try:
+        with serial.Serial(port, baudrate, timeout=0):
+            return True
+    except (serial.SerialException, ValueError) as e:
+        logging.debug(f"Host cannot open {port} at {baudrate} baud: {e}")
+        return False
+
+
+def _answers_at(port: str, baudrate: int) -> bool:
+    response = send_at_command(port, "AT", BAUDRATE_SWITCH_TIMEOUT, baudrate)
+    return "OK" in response.splitlines()
+
+
+def _switch_module_baudrate(port: str, setting: int, baudrate: int) -> bool:
+    response = send_at_command(
+        port, f"AT+IPR={setting}", BAUDRATE_SWITCH_TIMEOUT, baudrate
+    )
+    return "OK" in response.splitlines()
+
+
+@contextmanager
+def fast_baudrate(port: str, baudrate: int = DEFAULT_BAUDRATE) -> Iterator[int]:
+    """
+    Temporarily switches the module and the host to the fastest verified baud rate.
+
+    The supported rates are read with AT+IPR=?, keeping those the host can
+    open the port with. Each candidate is set with AT+IPR and then confirmed
+    with an AT handshake at the new rate. If no faster rate works, the
+    original rate is used. The module's original AT+IPR setting is restored
+    on exit.
+
+    Args:
+        port (str): The serial port to use.
+        baudrate (int, optional): The current baud rate of the module and the host.
+
+    Yields:
+        int: The baud rate to use inside the block.
+
+    Raises:
+        serial.SerialException: If the module answers neither at a new rate nor,
+            after switching back, at the original rate.
+    """
+    ipr = send_at_command(port, "AT+IPR?", BAUDRATE_SWITCH_TIMEOUT, baudrate)
+    match = re.search(r"\+IPR:\s*(\d+)", ipr)
+    original_setting = int(match.group(1)) if match else baudrate
+    supported = send_at_command(port, "AT+IPR=?", BAUDRATE_SWITCH_TIMEOUT, baudrate)
+    # Rates the host cannot set are skipped before the module is switched to them.
+    candidates = [
+        rate
+        for rate in parse_supported_baudrates(supported)
+        if rate > baudrate and _host_supports(port, rate)
+    ]
+    current = baudrate
+    for rate in reversed(candidates[-BAUDRATE_MAX_ATTEMPTS:]):
+        if not _switch_module_baudrate(port, rate, baudrate):
+            logging.debug(f"Module on {port} rejected AT+IPR={rate}")
+            continue
+        if _answers_at(port, rate):
+            current = rate
+            break
+        logging.warning(f"No answer at {rate} baud, falling back to {baudrate}")
+        _switch_module_baudrate(port, original_setting, rate)
+        if not _answers_at(port, baudrate):
+            raise serial.SerialException(
+                f"Module on {port} does not answer at {baudrate} baud "
+                f"after a failed switch to {rate}"
+            )
+
+    if current == baudrate:
+        logging.info(f"Keeping {baudrate} baud on {port}")
+    else:
+        logging.info(f"Switched {port} to {current} baud")
+    try:
+        yield current
+    finally:
+        if current != baudrate:
+            _switch_module_baudrate(port, original_setting, current)
+            if _answers_at(port, baudrate):
+                logging.info(f"Restored {port} to {baudrate} baud")
+            else:
+                logging.error(f"Could not restore {port} to {baudrate} baud")
+
+
 def creat_status_file(result: str, model: str) -> None:
     """
     Creates a status file with the provided result.
@@ -132,14 +428,15 @@ def creat_status_file(result: str, model: str) -> None:
     Returns:
         None
     """
-    try:
-        time_stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
-        file_name = STATUS_FILE_PATTERN.format(model=model, timestamp=time_stamp)
-        with open(file_name, "w") as f:
-            f.write(result)
-        logging.info(f"Status file created: {file_name}")
-    except Exception as e:
-        logging.error(f"Error creating status file: {e}")
+    with tracing.span("creat_status_file", model=model):
+        try:
+            time_stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+            file_name = STATUS_FILE_PATTERN.format(model=model, timestamp=time_stamp)
+            with open(file_name, "w") as f:
+                f.write(result)
+            logging.info(f"Status file created: {file_name}")
+        except Exception as e:
+            logging.error(f"Error creating status file: {e}")
 
 
 def get_interactive_command() -> str:
@@ -188,6 +485,10 @@ def start_process(
     search: int,
     baudrate: int = DEFAULT_BAUDRATE,
     interactive: bool = False,
+    file_tag: str = "",
+    cmux: bool = False,
+    negotiate_baudrate: bool = False,
+    lock_wait: Optional[float] = None,
 ) -> None:
     """
     Main function to retrieve the status of an EM9xxx module using AT commands.
@@ -199,6 +500,11 @@ def start_process(
         search (int): The search parameter to use.
         baudrate (int, optional): The baud rate to use for the serial connection.
         interactive (bool, optional): Run in interactive mode if True.
+        file_tag (str, optional): Extra tag appended to the model in the status file name.
+        cmux (bool, optional): Run the sweep and the network search in parallel over CMUX.
+        negotiate_baudrate (bool, optional): Temporarily switch to the fastest baud rate the module supports.
+        lock_wait (float, optional): Lock the port for the run, waiting up to this many seconds
+            for other processes using it. The port is not locked when None.
     returns:
         None
     """
@@ -212,16 +518,35 @@ def start_process(
             with model {model} and baudrate {baudrate}"""
     )
 
-    if interactive:
-        handle_interactive_session(port, baudrate, model)
+    if lock_wait is not None:
+        # Imported on demand so plain runs do not load the locking and CMUX code.
+        from sierra_status.src.portlock import port_lock
+
+        lock = port_lock(port, lock_wait)
     else:
-        result = get_module_status(port, search, model, baudrate)
-        if result:
-            time_stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
-            result = f"Finished time: {time_stamp}\n" + result
-            creat_status_file(result, model)
+        lock = nullcontext()
+    with tracing.span("start_process", port=port, model=model), lock:
+        if interactive:
+            handle_interactive_session(port, baudrate, model)
         else:
-            logging.error("No result received from the module.")
+            rate_context = (
+                fast_baudrate(port, baudrate)
+                if negotiate_baudrate
+                else nullcontext(baudrate)
+            )
+            with rate_context as rate:
+                if cmux:
+                    from sierra_status.src.cmux import get_module_status_cmux
+
+                    result = get_module_status_cmux(port, search, model, rate)
+                else:
+                    result = get_module_status(port, search, model, rate)
+            if result:
+                time_stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime())
+                result = f"Finished time: {time_stamp}\n" + result
+                creat_status_file(result, f"{model}_{file_tag}" if file_tag else model)
+            else:
+                logging.error("No result received from the module.")
 
     logging.info(
         f"Total time for running this script: {time.time() - start_time:.2f} seconds"
@@ -0,0 +1,144 @@
+import os
+import subprocess
+import sys
+import time
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from sierra_status.src import tracing
+from sierra_status.src.cli import main
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Extra time sierra-status --version may add on top of a bare interpreter start.
+STARTUP_BUDGET = 0.05
+STARTUP_RUNS = 5
+
+RUN_CLI = (
+    "import sys\n"
+    "from sierra_status.src.cli import main\n"
+    "sys.argv = ['sierra-status'] + sys.argv[1:]\n"
+    "try:\n"
+    "    main()\n"
+    "except SystemExit:\n"
+    "    pass\n"
+    "loaded = [name for name in sys.modules if name == 'serial'\n"
+    "          or name.startswith(('serial.', 'sierra_status.src.usb_handle'))]\n"
+    "print('LOADED', sorted(loaded))\n"
+)
+
+
+def _run(*args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+
+
+def _fastest_run(*args: str) -> float:
+    durations = []
+    for _ in range(STARTUP_RUNS):
+        start_time = time.perf_counter()
+        _run(*args)
+        durations.append(time.perf_counter() - start_time)
+    return min(durations)
+
+
+class TestCliStartup(unittest.TestCase):
+    def test_version_does_not_load_serial(self) -> None:
+        result = _run("-c", RUN_CLI, "--version")
+        self.assertIn("sierra-status", result.stdout)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_help_does_not_load_serial(self) -> None:
+        result = _run("-c", RUN_CLI, "--help")
+        self.assertIn("--port", result.stdout)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_missing_port_is_a_usage_error(self) -> None:
+        result = _run("-c", RUN_CLI)
+        self.assertIn("-p/--port", result.stderr)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_watch_rejects_port_and_interactive(self) -> None:
+        result = _run("-c", RUN_CLI, "-w", "-p", "/dev/null")
+        self.assertIn("-p/--port cannot be used with -w/--watch", result.stderr)
+        result = _run("-c", RUN_CLI, "-w", "-i")
+        self.assertIn("-i/--interactive cannot be used with -w/--watch", result.stderr)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_unwritable_trace_file_is_a_usage_error(self) -> None:
+        trace_file = os.path.join(REPO_ROOT, "missing", "trace.json")
+        result = _run("-c", RUN_CLI, "-p", "/dev/null", "--trace", trace_file)
+        self.assertIn(f"The trace file '{trace_file}' cannot be written", result.stderr)
+        self.assertNotIn("Traceback", result.stderr)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_cmux_is_rejected_in_interactive_mode(self) -> None:
+        result = _run("-c", RUN_CLI, "-p", "/dev/null", "-i", "--cmux")
+        self.assertIn("--cmux cannot be used with -i/--interactive", result.stderr)
+        self.assertIn("LOADED []", result.stdout)
+
+    def test_fast_baudrate_is_rejected_in_interactive_mode(self) -> None:
+        result = _run("-c", RUN_CLI, "-p", "/dev/null", "-i", "-f")
+        self.assertIn("-f/--fast-baudrate cannot be used with", result.stderr)
+
+    def test_usb_handle_does_not_load_optional_subsystems(self) -> None:
+        result = _run(
+            "-c",
+            "import sys\n"
+            "import sierra_status.src.usb_handle\n"
+            "print(sorted(name for name in sys.modules\n"
+            "             if name in ('sierra_status.src.cmux', 'sierra_status.src.portlock')))",
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_startup_time_budget(self) -> None:
+        baseline = _fastest_run("-c", "pass")
+        startup = _fastest_run("-c", RUN_CLI, "--version")
+        self.assertLess(
+            startup - baseline,
+            STARTUP_BUDGET,
+            f"sierra-status --version took {startup:.3f}s, "
+            f"a bare interpreter {baseline:.3f}s",
+        )
+
+
+class TestCliTrace(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.argv = ["sierra-status", "-p", os.devnull, "--lock-wait", "0"]
+        self.argv += ["--trace", os.path.join(self.directory, "trace.json")]
+
+    def tearDown(self) -> None:
+        tracing.disable()
+        os.rmdir(self.directory)
+
+    @patch("sierra_status.src.tracing.write_trace", side_effect=OSError("Disk full"))
+    @patch("sierra_status.src.usb_handle.start_process")
+    def test_trace_write_error_is_logged(self, mock_start_process, mock_write) -> None:
+        with patch.object(sys, "argv", self.argv), self.assertLogs(
+            level="ERROR"
+        ) as logs:
+            main()
+        self.assertIn("Could not write the trace file: Disk full", logs.output[0])
+
+    @patch("sierra_status.src.tracing.write_trace", side_effect=OSError("Disk full"))
+    @patch("sierra_status.src.usb_handle.start_process", side_effect=OSError("Busy"))
+    def test_trace_write_error_keeps_run_failure(
+        self, mock_start_process, mock_write
+    ) -> None:
+        with patch.object(sys, "argv", self.argv), self.assertLogs(
+            level="ERROR"
+        ) as logs:
+            with self.assertRaises(SystemExit) as context:
+                main()
+        self.assertEqual(context.exception.code, 1)
+        self.assertIn("An error occurred: Busy", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
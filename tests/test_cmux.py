@@ -0,0 +1,197 @@
+import os
+import select
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from sierra_status.src.cmux import (
+    DISC,
+    MSG_CLD,
+    PF,
+    SABM,
+    UA,
+    UIH,
+    CmuxError,
+    CmuxSession,
+    FrameDecoder,
+    encode_frame,
+    get_module_status_cmux,
+)
+from sierra_status.src.conf import AT_COMMAND_COPS, AT_COMMANDS_HL78
+
+try:
+    import tty
+except ImportError:  # pragma: no cover - not available on Windows
+    tty = None
+
+
+class FakeCmuxModem:
+    """
+    A module on the master side of a pty that understands AT+CMUX=0 and basic option frames.
+    """
+
+    def __init__(self, accept_cmux: bool = True, scan_delay: float = 0.5) -> None:
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self.accept_cmux = accept_cmux
+        self.scan_delay = scan_delay
+        self.completed = []
+        self.multiplexing = False
+        self._decoder = FrameDecoder()
+        self._lines = {}
+        self._write_lock = threading.Lock()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._thread.join()
+        os.close(self.master)
+        os.close(self._slave)
+
+    def _write(self, data: bytes) -> None:
+        with self._write_lock:
+            os.write(self.master, data)
+
+    def _send(self, dlci: int, text: str) -> None:
+        self._write(encode_frame(dlci, UIH, text.encode(), command=False))
+
+    def _run(self) -> None:
+        at_buffer = b""
+        while self._running:
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            data = os.read(self.master, 1024)
+            if not self.multiplexing:
+                at_buffer += data
+                if b"\r" in at_buffer:
+                    line, _, at_buffer = at_buffer.partition(b"\r")
+                    if line.strip() == b"AT+CMUX=0" and self.accept_cmux:
+                        self._write(b"\r\nOK\r\n")
+                        self.multiplexing = True
+                    else:
+                        self._write(b"\r\nERROR\r\n")
+                continue
+            for dlci, control, info in self._decoder.feed(data):
+                self._handle_frame(dlci, control, info)
+
+    def _handle_frame(self, dlci: int, control: int, info: bytes) -> None:
+        if control in (SABM, DISC):
+            if control == SABM and dlci == 1:
+                self._send(1, "\r\n+CEREG: 1\r\n")
+            self._write(encode_frame(dlci, UA | PF, command=False))
+        elif control == UIH and dlci == 0:
+            if info[0] == MSG_CLD:
+                self.multiplexing = False
+        elif control == UIH:
+            self._lines[dlci] = self._lines.get(dlci, "") + info.decode()
+            while "\r" in self._lines[dlci]:
+                command, _, rest = self._lines[dlci].partition("\r")
+                self._lines[dlci] = rest.lstrip("\n")
+                self._answer(dlci, command)
+
+    def _answer(self, dlci: int, command: str) -> None:
+        if command == AT_COMMAND_COPS:
+
+            def scan() -> None:
+                time.sleep(self.scan_delay)
+                self.completed.append(command)
+                self._send(dlci, '\r\n+COPS: (2,"Test","Test","00101",7)\r\n\r\nOK\r\n')
+
+            threading.Thread(target=scan, daemon=True).start()
+            return
+        reply = "\r\nHL7802\r\n" if command == "ATI" else ""
+        self.completed.append(command)
+        self._send(dlci, f"{reply}\r\nOK\r\n")
+
+
+class TestFrames(unittest.TestCase):
+    def test_encode_sabm_and_ua(self) -> None:
+        self.assertEqual(encode_frame(0, SABM | PF).hex(), "f9033f011cf9")
+        self.assertEqual(encode_frame(0, UA | PF).hex(), "f9037301d7f9")
+
+    def test_decode_split_and_long_frames(self) -> None:
+        stream = encode_frame(1, UIH, b"AT\r\n") + encode_frame(2, UIH, b"x" * 200)
+        decoder = FrameDecoder()
+        frames = decoder.feed(stream[:20]) + decoder.feed(stream[20:])
+        self.assertEqual(frames, [(1, UIH, b"AT\r\n"), (2, UIH, b"x" * 200)])
+
+    def test_decode_skips_corrupt_frame(self) -> None:
+        corrupt = bytearray(encode_frame(1, UIH, b"bad"))
+        corrupt[-2] ^= 0xFF
+        frames = FrameDecoder().feed(bytes(corrupt) + encode_frame(2, UIH, b"ok"))
+        self.assertEqual(frames, [(2, UIH, b"ok")])
+
+
+@unittest.skipIf(tty is None or not hasattr(os, "openpty"), "requires a pty")
+class TestCmuxSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modem = FakeCmuxModem()
+
+    def tearDown(self) -> None:
+        self.modem.stop()
+
+    def test_channels_run_in_parallel(self) -> None:
+        with CmuxSession(self.modem.port, channels=2) as session:
+            scan = []
+            scanner = threading.Thread(
+                target=lambda: scan.append(
+                    session.channel(2).send_command(AT_COMMAND_COPS, 5)
+                )
+            )
+            scanner.start()
+            time.sleep(0.1)
+            self.assertEqual(session.channel(1).send_command("ATI", 5), "HL7802\nOK")
+            scanner.join()
+        self.assertEqual(self.modem.completed, ["ATI", AT_COMMAND_COPS])
+        self.assertIn("+COPS:", scan[0])
+        self.assertFalse(self.modem.multiplexing)
+
+    def test_long_command_is_split_into_frames(self) -> None:
+        command = "AT+CGDCONT=1," + '"IP","' + "a" * 60 + '"'
+        with CmuxSession(self.modem.port, channels=1) as session:
+            self.assertEqual(session.channel(1).send_command(command, 5), "OK")
+        self.assertEqual(self.modem.completed, [command])
+
+    def test_get_module_status_cmux(self) -> None:
+        result = get_module_status_cmux(self.modem.port, 1, "")
+        self.assertTrue(result.startswith("HL7802\nOK"))
+        self.assertEqual(result.count("OK"), len(AT_COMMANDS_HL78) + 1)
+        self.assertIn("+COPS:", result)
+        self.assertIn("+CEREG: 1", result)
+        # The scan started first but the sweep kept going while it was running.
+        self.assertGreater(self.modem.completed.index(AT_COMMAND_COPS), 0)
+
+
+@unittest.skipIf(tty is None or not hasattr(os, "openpty"), "requires a pty")
+class TestCmuxRejected(unittest.TestCase):
+    def setUp(self) -> None:
+        self.modem = FakeCmuxModem(accept_cmux=False)
+
+    def tearDown(self) -> None:
+        self.modem.stop()
+
+    @patch("sierra_status.src.cmux.CMUX_SETUP_TIMEOUT", 1)
+    def test_cmux_rejected(self) -> None:
+        with self.assertRaises(CmuxError):
+            CmuxSession(self.modem.port).open()
+
+    @patch("sierra_status.src.cmux.CMUX_SETUP_TIMEOUT", 1)
+    @patch("sierra_status.src.usb_handle.get_module_status")
+    def test_get_module_status_cmux_falls_back(self, mock_get_module_status) -> None:
+        mock_get_module_status.return_value = "Plain Status"
+        with self.assertLogs(level="WARNING"):
+            result = get_module_status_cmux(self.modem.port, 1, "hl78xx", 9600)
+        self.assertEqual(result, "Plain Status")
+        mock_get_module_status.assert_called_once_with(
+            self.modem.port, 1, "hl78xx", 9600
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
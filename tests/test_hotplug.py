@@ -0,0 +1,237 @@
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import unittest
+import serial
+from unittest.mock import patch
+
+from sierra_status.src.hotplug import (
+    DirectoryWatcher,
+    _parse_inotify_events,
+    collect_device,
+    is_candidate_port,
+    wait_for_modem,
+    watch_ports,
+)
+
+
+def _wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+class TestIsCandidatePort(unittest.TestCase):
+    def test_matching_names(self) -> None:
+        for name in ["ttyUSB0", "ttyUSB12", "ttyACM3"]:
+            with self.subTest(name=name):
+                self.assertTrue(is_candidate_port(name, ["ttyUSB*", "ttyACM*"]))
+
+    def test_non_matching_names(self) -> None:
+        for name in ["tty0", "sda1", "null"]:
+            with self.subTest(name=name):
+                self.assertFalse(is_candidate_port(name, ["ttyUSB*", "ttyACM*"]))
+
+
+class TestParseInotifyEvents(unittest.TestCase):
+    def test_parse_multiple_events(self) -> None:
+        data = b""
+        for name in [b"ttyUSB0", b"ttyACM1"]:
+            padded = name + b"\0" * (16 - len(name))
+            data += struct.pack("iIII", 1, 0x100, 0, len(padded)) + padded
+        self.assertEqual(_parse_inotify_events(data), ["ttyUSB0", "ttyACM1"])
+
+
+class TestDirectoryWatcher(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        open(os.path.join(self.directory, "ttyUSB0"), "w").close()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def _assert_reports_new_entry(self, watcher: DirectoryWatcher) -> None:
+        try:
+            open(os.path.join(self.directory, "ttyUSB1"), "w").close()
+            self.assertEqual(watcher.read_events(0.5), ["ttyUSB1"])
+            self.assertEqual(watcher.read_events(0.05), [])
+        finally:
+            watcher.close()
+
+    def test_reports_new_entries(self) -> None:
+        self._assert_reports_new_entry(DirectoryWatcher(self.directory))
+
+    @patch("sierra_status.src.hotplug._inotify_open", return_value=None)
+    def test_polling_fallback(self, mock_inotify_open) -> None:
+        self._assert_reports_new_entry(DirectoryWatcher(self.directory))
+
+    def test_missing_directory(self) -> None:
+        with self.assertRaises(ValueError):
+            DirectoryWatcher(os.path.join(self.directory, "missing"))
+
+
+class TestWaitForModem(unittest.TestCase):
+    @patch("sierra_status.src.hotplug.serial.Serial")
+    def test_wait_for_modem_ready(self, mock_serial) -> None:
+        console = mock_serial.return_value.__enter__.return_value
+        console.read_until.return_value = b"AT\r\nOK\r\n"
+        self.assertTrue(wait_for_modem("/dev/ttyUSB0", timeout=1))
+        console.write.assert_called_with(b"AT\r\n")
+
+    @patch("sierra_status.src.hotplug.time.sleep")
+    @patch("sierra_status.src.hotplug.time.time")
+    @patch("sierra_status.src.hotplug.serial.Serial")
+    def test_wait_for_modem_timeout(self, mock_serial, mock_time, mock_sleep) -> None:
+        mock_serial.side_effect = serial.SerialException("Port busy")
+        mock_time.side_effect = [0, 0, 1, 31]
+        self.assertFalse(wait_for_modem("/dev/ttyUSB0", timeout=30))
+        self.assertEqual(mock_serial.call_count, 2)
+
+
+@patch("sierra_status.src.hotplug.port_lock")
+class TestCollectDevice(unittest.TestCase):
+    @patch("sierra_status.src.hotplug.usb_device_path", return_value=None)
+    @patch("sierra_status.src.hotplug.usb_handle.start_process")
+    @patch("sierra_status.src.hotplug.wait_for_modem", return_value=True)
+    def test_collect_device_ready(
+        self, mock_wait, mock_start_process, mock_usb_device_path, mock_port_lock
+    ) -> None:
+        collect_device("/dev/ttyUSB0", "em9191", logging.INFO, 0, 115200)
+        mock_start_process.assert_called_once_with(
+            "/dev/ttyUSB0",
+            "em9191",
+            logging.INFO,
+            0,
+            115200,
+            file_tag="ttyUSB0",
+            cmux=False,
+            negotiate_baudrate=False,
+        )
+        mock_port_lock.assert_called_once_with("/dev/ttyUSB0", 120)
+
+    @patch("sierra_status.src.hotplug.usb_handle.start_process")
+    def test_collect_device_locks_probe(
+        self, mock_start_process, mock_port_lock
+    ) -> None:
+        events = []
+        mock_port_lock.return_value.__enter__.side_effect = lambda: events.append(
+            "lock"
+        )
+        mock_port_lock.return_value.__exit__.side_effect = lambda *args: events.append(
+            "unlock"
+        )
+        mock_start_process.side_effect = lambda *args, **kwargs: events.append(
+            "collect"
+        )
+        with patch(
+            "sierra_status.src.hotplug.wait_for_modem",
+            side_effect=lambda *args: events.append("probe") or True,
+        ), patch("sierra_status.src.hotplug.usb_device_path", return_value=None):
+            collect_device("/dev/ttyUSB0", "em9191", logging.INFO, 0)
+        self.assertEqual(events, ["lock", "probe", "collect", "unlock"])
+
+    @patch("sierra_status.src.hotplug.usb_handle.start_process")
+    @patch("sierra_status.src.hotplug.wait_for_modem", return_value=True)
+    def test_collect_device_permission_error(
+        self, mock_wait, mock_start_process, mock_port_lock
+    ) -> None:
+        mock_port_lock.side_effect = PermissionError("Permission denied")
+        with self.assertLogs(level="ERROR"):
+            collect_device("/dev/ttyUSB0", "em9191", logging.INFO, 0)
+        mock_start_process.assert_not_called()
+
+    @patch("sierra_status.src.hotplug.usb_handle.start_process")
+    @patch("sierra_status.src.hotplug.wait_for_modem", return_value=False)
+    def test_collect_device_not_ready(
+        self, mock_wait, mock_start_process, mock_port_lock
+    ) -> None:
+        with self.assertLogs(level="INFO") as logs:
+            collect_device("/dev/ttyUSB0", "em9191", logging.INFO, 0)
+        self.assertIn("did not answer AT", logs.output[0])
+        self.assertNotIn("ERROR", logs.output[0])
+        mock_start_process.assert_not_called()
+
+    @patch("sierra_status.src.hotplug.usb_device_path", return_value="1-1")
+    @patch("sierra_status.src.hotplug.wait_for_modem", return_value=True)
+    def test_collect_device_skips_sibling_port(
+        self, mock_wait, mock_usb_device_path, mock_port_lock
+    ) -> None:
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_collection(*args, **kwargs) -> None:
+            started.set()
+            release.wait(5)
+
+        with patch(
+            "sierra_status.src.hotplug.usb_handle.start_process",
+            side_effect=slow_collection,
+        ) as mock_start_process:
+            first = threading.Thread(
+                target=collect_device, args=("/dev/ttyUSB2", "em9191", logging.INFO, 0)
+            )
+            first.start()
+            self.assertTrue(started.wait(5))
+            with self.assertLogs(level="INFO") as logs:
+                collect_device("/dev/ttyUSB3", "em9191", logging.INFO, 0)
+            release.set()
+            first.join(5)
+            self.assertIn("already collected", logs.output[0])
+            self.assertEqual(mock_start_process.call_count, 1)
+            # The device can be collected again once the first run finished.
+            collect_device("/dev/ttyUSB3", "em9191", logging.INFO, 0)
+            self.assertEqual(mock_start_process.call_count, 2)
+
+
+class TestWatchPorts(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.stop_event = threading.Event()
+
+    def tearDown(self) -> None:
+        self.stop_event.set()
+        shutil.rmtree(self.directory)
+
+    @patch("sierra_status.src.hotplug.collect_device")
+    def test_watch_ports_collects_new_ports(self, mock_collect_device) -> None:
+        watcher = threading.Thread(
+            target=watch_ports,
+            args=(self.directory, "em9191", logging.INFO, 0),
+            kwargs={
+                "stop_event": self.stop_event,
+                "cmux": True,
+                "negotiate_baudrate": True,
+            },
+        )
+        watcher.start()
+        time.sleep(0.2)
+        for name in ["ttyUSB0", "ttyACM0", "console"]:
+            open(os.path.join(self.directory, name), "w").close()
+        self.assertTrue(_wait_until(lambda: mock_collect_device.call_count == 2))
+        self.stop_event.set()
+        watcher.join(5)
+        ports = sorted(call.args[0] for call in mock_collect_device.call_args_list)
+        self.assertTrue(
+            all(
+                call.args[-2:] == (True, True)
+                for call in mock_collect_device.call_args_list
+            )
+        )
+        self.assertEqual(
+            ports,
+            [
+                os.path.join(self.directory, "ttyACM0"),
+                os.path.join(self.directory, "ttyUSB0"),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
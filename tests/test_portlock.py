@@ -0,0 +1,131 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import stat
+import unittest
+from unittest.mock import patch
+
+from sierra_status.src.portlock import PortLockError, lock_directory, port_lock
+
+
+@unittest.skipIf(os.name != "posix", "UUCP lock files are only used on POSIX")
+class TestPortLock(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.lock_file = os.path.join(self.directory, "LCK..ttyUSB0")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def _write_lock(self, pid: int) -> None:
+        with open(self.lock_file, "w") as f:
+            f.write(f"{pid:10d}\n")
+
+    def test_lock_file_holds_pid(self) -> None:
+        with port_lock("/dev/ttyUSB0", 0, self.directory):
+            with open(self.lock_file) as f:
+                self.assertEqual(f.read(), f"{os.getpid():10d}\n")
+        self.assertFalse(os.path.exists(self.lock_file))
+
+    def test_locked_by_other_process(self) -> None:
+        self._write_lock(os.getppid())
+        with self.assertRaises(PortLockError) as context:
+            with port_lock("/dev/ttyUSB0", 0, self.directory):
+                self.fail("lock acquired while held by another process")
+        self.assertIn(f"locked by PID {os.getppid()}", str(context.exception))
+        self.assertIn("queue position 1", str(context.exception))
+        self.assertTrue(os.path.exists(self.lock_file))
+
+    def test_stale_lock_is_removed(self) -> None:
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        self._write_lock(process.pid)
+        with port_lock("/dev/ttyUSB0", 0, self.directory):
+            with open(self.lock_file) as f:
+                self.assertEqual(int(f.read()), os.getpid())
+
+    def _dead_pid(self) -> int:
+        process = subprocess.Popen([sys.executable, "-c", "pass"])
+        process.wait()
+        return process.pid
+
+    def test_queue_directories_are_shared_and_removed(self) -> None:
+        queue_dir = os.path.join(self.directory, "sierra_status", "ttyUSB0")
+
+        def waiter() -> None:
+            with port_lock("/dev/ttyUSB0", 5, self.directory):
+                pass
+
+        with port_lock("/dev/ttyUSB0", 0, self.directory):
+            thread = threading.Thread(target=waiter)
+            thread.start()
+            time.sleep(0.1)
+            for path in [os.path.dirname(queue_dir), queue_dir]:
+                self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o1777)
+        thread.join()
+        self.assertFalse(os.path.exists(queue_dir))
+
+    @patch("sierra_status.src.portlock.os.access", return_value=False)
+    def test_lock_directory_fallback_warns(self, mock_access) -> None:
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(lock_directory(self.directory), tempfile.gettempdir())
+
+    def test_stale_lock_of_other_user(self) -> None:
+        self._write_lock(self._dead_pid())
+        real_remove = os.remove
+
+        def remove(path: str) -> None:
+            if path == self.lock_file:
+                raise PermissionError(path)
+            real_remove(path)
+
+        with patch(
+            "sierra_status.src.portlock.os.remove", side_effect=remove
+        ), self.assertLogs(level="WARNING") as logs:
+            with self.assertRaises(PortLockError):
+                with port_lock("/dev/ttyUSB0", 0, self.directory):
+                    self.fail("lock acquired while the stale lock is still there")
+        self.assertIn("cannot be removed", logs.output[0])
+
+    def test_stale_ticket_of_other_user(self) -> None:
+        queue_dir = os.path.join(self.directory, "sierra_status", "ttyUSB0")
+        os.makedirs(queue_dir)
+        with open(os.path.join(queue_dir, "0" * 20 + ".1.1"), "w") as f:
+            f.write(f"{self._dead_pid():10d}\n")
+        real_remove = os.remove
+
+        def remove(path: str) -> None:
+            if path.startswith(queue_dir) and path.endswith(".1.1"):
+                raise PermissionError(path)
+            real_remove(path)
+
+        with patch("sierra_status.src.portlock.os.remove", side_effect=remove):
+            with port_lock("/dev/ttyUSB0", 0, self.directory):
+                self.assertTrue(os.path.exists(self.lock_file))
+
+    def test_waiters_are_served_in_order(self) -> None:
+        order = []
+
+        def waiter(name: str) -> None:
+            with port_lock("/dev/ttyUSB0", 5, self.directory):
+                order.append(name)
+                time.sleep(0.1)
+
+        with port_lock("/dev/ttyUSB0", 0, self.directory):
+            threads = []
+            for name in ["first", "second", "third"]:
+                thread = threading.Thread(target=waiter, args=(name,))
+                thread.start()
+                threads.append(thread)
+                time.sleep(0.1)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ["first", "second", "third"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from sierra_status.src.conf import AT_COMMANDS, AT_COMMANDS_HL78, AT_COMMANDS_WP76
+from sierra_status.src.profiles import (
+    family_for_model,
+    get_cached_profile,
+    load_profile,
+    parse_ati,
+    store_cached_profile,
+    usb_serial_number,
+)
+
+EM_ATI_REPLY = """ATI
+Manufacturer: Sierra Wireless, Incorporated
+Model: EM9191
+Revision: SWIX55C_03.09.06.00 b06bfc jenkins 2022/01/13 03:44:32
+IMEI: 353533100000000
+IMEI SV:  6
+FSN: 7N2070000000A1
++GCAP: +CGSM
+OK"""
+
+HL78_ATI_REPLY = """ATI
+HL7802
+OK"""
+
+
+class TestFamilyForModel(unittest.TestCase):
+    def test_known_models(self) -> None:
+        cases = {
+            "EM9191": "em",
+            "em7455": "em",
+            "MC7430": "em",
+            "hl78xx": "hl78xx",
+            "HL7802": "hl78xx",
+            "WP7607": "wp76xx",
+            "wp7702": "wp76xx",
+        }
+        for model, family in cases.items():
+            with self.subTest(model=model):
+                self.assertEqual(family_for_model(model), family)
+
+    def test_unknown_model(self) -> None:
+        self.assertIsNone(family_for_model("UnknownModel"))
+        self.assertIsNone(family_for_model(""))
+
+
+class TestLoadProfile(unittest.TestCase):
+    def test_load_profiles(self) -> None:
+        self.assertEqual(load_profile("em"), AT_COMMANDS)
+        self.assertEqual(load_profile("hl78xx"), AT_COMMANDS_HL78)
+        self.assertEqual(load_profile("wp76xx"), AT_COMMANDS_WP76)
+
+    def test_load_unknown_profile(self) -> None:
+        with self.assertRaises(ValueError):
+            load_profile("unknown")
+
+
+class TestParseATI(unittest.TestCase):
+    def test_parse_em_reply(self) -> None:
+        info = parse_ati(EM_ATI_REPLY)
+        self.assertEqual(info["model"], "EM9191")
+        self.assertTrue(info["firmware"].startswith("SWIX55C_03.09.06.00"))
+        self.assertEqual(info["serial"], "353533100000000")
+
+    def test_parse_hl78_reply(self) -> None:
+        self.assertEqual(parse_ati(HL78_ATI_REPLY), {"model": "HL7802"})
+
+    def test_parse_unknown_reply(self) -> None:
+        self.assertEqual(parse_ati("ERROR"), {})
+
+
+class TestUSBSerialNumber(unittest.TestCase):
+    @patch("serial.tools.list_ports.comports")
+    def test_usb_serial_number(self, mock_comports) -> None:
+        mock_comports.return_value = [
+            MagicMock(device="/dev/ttyUSB0", serial_number=None),
+            MagicMock(device="/dev/ttyUSB2", serial_number="ABC123"),
+        ]
+        self.assertEqual(usb_serial_number("/dev/ttyUSB2"), "ABC123")
+        self.assertIsNone(usb_serial_number("/dev/ttyUSB0"))
+        self.assertIsNone(usb_serial_number("/dev/ttyS0"))
+
+
+class TestProfileCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache_file = os.path.join(self.directory, "cache", "profiles.json")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory)
+
+    def test_cache_round_trip(self) -> None:
+        self.assertIsNone(get_cached_profile("ABC123", self.cache_file))
+        store_cached_profile("ABC123", "hl78xx", {"model": "HL7802"}, self.cache_file)
+        self.assertEqual(get_cached_profile("ABC123", self.cache_file), "hl78xx")
+        self.assertIsNone(get_cached_profile("OTHER", self.cache_file))
+
+    def test_corrupt_cache_is_ignored(self) -> None:
+        os.makedirs(os.path.dirname(self.cache_file))
+        with open(self.cache_file, "w") as f:
+            f.write("not json")
+        self.assertIsNone(get_cached_profile("ABC123", self.cache_file))
+        store_cached_profile("ABC123", "em", {}, self.cache_file)
+        self.assertEqual(get_cached_profile("ABC123", self.cache_file), "em")
+
+
+if __name__ == "__main__":
+    unittest.main()
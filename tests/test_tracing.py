@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from sierra_status.src import tracing
+from sierra_status.src.usb_handle import send_at_command
+
+
+class TestTracing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.directory, "trace.json")
+
+    def tearDown(self) -> None:
+        tracing.disable()
+        shutil.rmtree(self.directory)
+
+    def _read_events(self) -> list:
+        tracing.write_trace(self.trace_file)
+        with open(self.trace_file) as f:
+            return json.load(f)["traceEvents"]
+
+    def test_span_disabled_is_shared_noop(self) -> None:
+        self.assertFalse(tracing.is_enabled())
+        self.assertIs(tracing.span("a"), tracing.span("b", port="COM1"))
+        with tracing.span("a"):
+            pass
+        self.assertEqual(self._read_events(), [])
+
+    def test_span_enabled_records_complete_events(self) -> None:
+        tracing.enable()
+        with tracing.span("outer", port="COM1"):
+            with tracing.span("inner"):
+                pass
+        events = [event for event in self._read_events() if event["ph"] == "X"]
+        self.assertEqual([event["name"] for event in events], ["inner", "outer"])
+        inner, outer = events
+        self.assertEqual(outer["args"], {"port": "COM1"})
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+
+    def test_thread_names_are_recorded(self) -> None:
+        tracing.enable()
+
+        def worker() -> None:
+            with tracing.span("work"):
+                pass
+
+        thread = threading.Thread(target=worker, name="collect-ttyUSB0")
+        thread.start()
+        thread.join()
+        events = self._read_events()
+        names = [event["args"]["name"] for event in events if event["ph"] == "M"]
+        self.assertEqual(names, ["collect-ttyUSB0"])
+
+    def test_enable_discards_previous_events(self) -> None:
+        tracing.enable()
+        with tracing.span("old"):
+            pass
+        tracing.enable()
+        self.assertEqual(self._read_events(), [])
+
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    def test_send_at_command_spans(self, mock_serial) -> None:
+        console = mock_serial.return_value.__enter__.return_value
+        console.read.return_value = b"AT\r\nOK\r\n"
+        tracing.enable()
+        self.assertEqual(send_at_command("COM1", "AT"), "AT\nOK")
+        events = self._read_events()
+        names = [event["name"] for event in events if event["ph"] == "X"]
+        self.assertEqual(names, ["open", "write", "read", "send_at_command"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,5 @@
 import logging
+import threading
 import unittest
 import serial
 from unittest.mock import mock_open, patch, MagicMock
@@ -7,15 +8,21 @@ from sierra_status.src.conf import (
     AT_COMMAND_COPS,
     AT_COMMANDS,
     AT_COMMANDS_HL78,
+    AT_COMMANDS_WP76,
     DEFAULT_BAUDRATE,
 )
 from sierra_status.src.usb_handle import (
+    CommandResult,
     animate_spinner,
     creat_status_file,
+    detect_profile,
+    fast_baudrate,
     get_em_cops,
     get_interactive_command,
     get_module_status,
     handle_interactive_session,
+    iter_status,
+    parse_supported_baudrates,
     send_at_command,
     start_process,
 )
@@ -26,7 +33,7 @@ ENTER_CND_COMMAND = 'AT!ENTERCND="A710"'
 
 class TestATCommands(unittest.TestCase):
     def test_at_commands_properties(self) -> None:
-        for command_list in [AT_COMMANDS, AT_COMMANDS_HL78]:
+        for command_list in [AT_COMMANDS, AT_COMMANDS_HL78, AT_COMMANDS_WP76]:
             with self.subTest(command_list=command_list):
                 self.assertTrue(len(command_list) > 0)
                 for command in command_list:
@@ -196,6 +203,40 @@ class TestStartProcess(unittest.TestCase):
             level=logging.DEBUG, format="%(asctime)s - %(levelname)s - %(message)s"
         )
 
+    @patch("sierra_status.src.usb_handle.get_module_status")
+    @patch("sierra_status.src.usb_handle.creat_status_file")
+    def test_start_process_file_tag(
+        self, mock_creat_status_file, mock_get_module_status
+    ) -> None:
+        mock_get_module_status.return_value = "Test Status"
+        start_process("COM1", "TestModel", logging.INFO, 0, file_tag="ttyUSB0")
+        self.assertEqual(mock_creat_status_file.call_args[0][1], "TestModel_ttyUSB0")
+
+    @patch("sierra_status.src.portlock.port_lock")
+    @patch("sierra_status.src.usb_handle.get_module_status")
+    @patch("sierra_status.src.usb_handle.creat_status_file")
+    def test_start_process_lock(
+        self, mock_creat_status_file, mock_get_module_status, mock_port_lock
+    ) -> None:
+        mock_get_module_status.return_value = "Test Status"
+        start_process("COM1", "TestModel", logging.INFO, 0)
+        mock_port_lock.assert_not_called()
+        start_process("COM1", "TestModel", logging.INFO, 0, lock_wait=30)
+        mock_port_lock.assert_called_once_with("COM1", 30)
+        mock_port_lock.return_value.__enter__.assert_called_once()
+
+    @patch("sierra_status.src.cmux.get_module_status_cmux")
+    @patch("sierra_status.src.usb_handle.get_module_status")
+    @patch("sierra_status.src.usb_handle.creat_status_file")
+    def test_start_process_cmux(
+        self, mock_creat_status_file, mock_get_module_status, mock_cmux
+    ) -> None:
+        mock_cmux.return_value = "CMUX Status"
+        start_process("COM1", "TestModel", logging.INFO, 1, 9600, cmux=True)
+        mock_cmux.assert_called_once_with("COM1", 1, "TestModel", 9600)
+        mock_get_module_status.assert_not_called()
+        self.assertIn("CMUX Status", mock_creat_status_file.call_args[0][0])
+
     @patch("sierra_status.src.usb_handle.get_module_status")
     @patch("sierra_status.src.usb_handle.creat_status_file")
     @patch("sierra_status.src.usb_handle.logging.error")
@@ -255,6 +296,267 @@ class TestGetModuleStatusAdvanced(unittest.TestCase):
         self.assertNotIn("COPS Error", result)
 
 
+class TestDetectProfile(unittest.TestCase):
+    @patch("sierra_status.src.usb_handle.profiles.store_cached_profile")
+    @patch("sierra_status.src.usb_handle.profiles.usb_serial_number")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_detect_profile_from_ati(
+        self, mock_send_at_command, mock_usb_serial_number, mock_store
+    ) -> None:
+        mock_usb_serial_number.return_value = "ABC123"
+        mock_send_at_command.return_value = "ATI\nHL7802\nOK"
+        with patch(
+            "sierra_status.src.usb_handle.profiles.get_cached_profile",
+            return_value=None,
+        ):
+            family, ati_reply = detect_profile("COM1")
+        self.assertEqual(family, "hl78xx")
+        self.assertEqual(ati_reply, "ATI\nHL7802\nOK")
+        mock_store.assert_called_once_with("ABC123", "hl78xx", {"model": "HL7802"})
+
+    @patch("sierra_status.src.usb_handle.profiles.get_cached_profile")
+    @patch("sierra_status.src.usb_handle.profiles.usb_serial_number")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_detect_profile_from_cache(
+        self, mock_send_at_command, mock_usb_serial_number, mock_get_cached
+    ) -> None:
+        mock_usb_serial_number.return_value = "ABC123"
+        mock_get_cached.return_value = "wp76xx"
+        self.assertEqual(detect_profile("COM1"), ("wp76xx", None))
+        mock_send_at_command.assert_not_called()
+
+    @patch("sierra_status.src.usb_handle.profiles.usb_serial_number")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_detect_profile_unknown(
+        self, mock_send_at_command, mock_usb_serial_number
+    ) -> None:
+        mock_usb_serial_number.return_value = None
+        mock_send_at_command.return_value = "ERROR"
+        self.assertEqual(detect_profile("COM1"), ("em", "ERROR"))
+
+    @patch("sierra_status.src.usb_handle.profiles.usb_serial_number")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_get_module_status_auto_detect(
+        self, mock_send_at_command, mock_usb_serial_number
+    ) -> None:
+        mock_usb_serial_number.return_value = None
+        mock_send_at_command.side_effect = lambda port, command, **kwargs: (
+            "ATI\nModel: WP7607\nOK" if command == "ATI" else "OK"
+        )
+        result = get_module_status("COM1", 0, "")
+        sent = [call.args[1] for call in mock_send_at_command.call_args_list]
+        self.assertEqual(sent, AT_COMMANDS_WP76)
+        self.assertTrue(result.startswith("ATI\nModel: WP7607"))
+
+
+class TestIterStatus(unittest.TestCase):
+    def test_command_result_status(self) -> None:
+        self.assertTrue(CommandResult("AT", "AT\nOK", 0.1).ok)
+        self.assertFalse(CommandResult("AT", "AT\nOK", 0.1).error)
+        self.assertTrue(CommandResult("AT+X", "AT+X\nERROR", 0.1).error)
+        self.assertTrue(CommandResult("AT+CIMI", "+CME ERROR: 10", 0.1).error)
+        self.assertFalse(CommandResult("AT+CIMI", "", 0.1).ok)
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_explicit_commands(self, mock_send_at_command) -> None:
+        mock_send_at_command.side_effect = lambda port, command, **kwargs: (
+            f"{command}\nOK"
+        )
+        results = list(iter_status("COM1", ["ATI", "AT+CPIN?"]))
+        self.assertEqual([result.command for result in results], ["ATI", "AT+CPIN?"])
+        self.assertEqual(results[1].response, "AT+CPIN?\nOK")
+        self.assertTrue(all(result.ok for result in results))
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_profile_name(self, mock_send_at_command) -> None:
+        mock_send_at_command.return_value = "OK"
+        results = list(iter_status("COM1", "hl78xx"))
+        self.assertEqual([result.command for result in results], list(AT_COMMANDS_HL78))
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_stops_early(self, mock_send_at_command) -> None:
+        mock_send_at_command.side_effect = ["OK", "+CPIN: SIM PIN\nOK", "OK"]
+        for result in iter_status("COM1", ["ATI", "AT+CPIN?", "AT+CIMI"]):
+            if "SIM PIN" in result.response:
+                break
+        self.assertEqual(mock_send_at_command.call_count, 2)
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_stop_event(self, mock_send_at_command) -> None:
+        stop_event = threading.Event()
+        mock_send_at_command.side_effect = lambda *args, **kwargs: (
+            stop_event.set() or "OK"
+        )
+        results = list(
+            iter_status("COM1", ["ATI", "AT+CPIN?"], search=True, stop_event=stop_event)
+        )
+        self.assertEqual(len(results), 1)
+        self.assertEqual(mock_send_at_command.call_count, 1)
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_search(self, mock_send_at_command) -> None:
+        mock_send_at_command.side_effect = ["OK", "+COPS: (1,...)\nOK"]
+        results = list(iter_status("COM1", ["ATI"], baudrate=9600, search=True))
+        self.assertEqual(results[-1].command, AT_COMMAND_COPS)
+        mock_send_at_command.assert_called_with(
+            "COM1", AT_COMMAND_COPS, timeout=120, baudrate=9600, spinner=False
+        )
+
+    @patch("sierra_status.src.usb_handle.profiles.store_cached_profile")
+    @patch("sierra_status.src.usb_handle.profiles.get_cached_profile")
+    @patch("sierra_status.src.usb_handle.profiles.usb_serial_number")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_iter_status_custom_send(
+        self, mock_send_at_command, mock_usb_serial_number, mock_get_cached, mock_store
+    ) -> None:
+        mock_usb_serial_number.return_value = "ABC123"
+        mock_get_cached.return_value = None
+        sent = []
+
+        def send(command: str, timeout: float) -> str:
+            sent.append(command)
+            return "HL7802\nOK" if command == "ATI" else "OK"
+
+        results = list(iter_status("COM1", send=send))
+        self.assertEqual(sent, AT_COMMANDS_HL78)
+        self.assertEqual(results[0].response, "HL7802\nOK")
+        mock_store.assert_called_once_with("ABC123", "hl78xx", {"model": "HL7802"})
+        mock_send_at_command.assert_not_called()
+
+    @patch("sierra_status.src.usb_handle.sys.stdout")
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    def test_iter_status_writes_nothing_to_stdout(
+        self, mock_serial, mock_stdout
+    ) -> None:
+        console = mock_serial.return_value.__enter__.return_value
+        console.read.side_effect = [b"AT+CPIN?\r\n", b"+CPIN: READY\r\nOK\r\n"]
+        results = list(iter_status("COM1", ["AT+CPIN?"]))
+        self.assertEqual(results[0].response, "AT+CPIN?\n+CPIN: READY\nOK")
+        mock_stdout.write.assert_not_called()
+
+
+class FakeBaudrateModem:
+    """
+    Answers send_at_command calls like a UART module that follows AT+IPR.
+    """
+
+    def __init__(self, supported: str, broken=()) -> None:
+        self.supported = supported
+        self.broken = set(broken)
+        self.rate = 115200
+        self.setting = 115200
+
+    def __call__(self, port, command, timeout=60, baudrate=115200) -> str:
+        if baudrate != self.rate:
+            return ""
+        if baudrate in self.broken:
+            # Commands still reach the module but its replies are garbled.
+            if command.startswith("AT+IPR="):
+                self.setting = int(command.split("=")[1])
+                self.rate = self.setting or self.rate
+            return ""
+        if command == "AT+IPR?":
+            return f"+IPR: {self.setting}\nOK"
+        if command == "AT+IPR=?":
+            return f"{self.supported}\nOK"
+        if command.startswith("AT+IPR="):
+            self.setting = int(command.split("=")[1])
+            self.rate = self.setting or self.rate
+        return "OK"
+
+
+class TestFastBaudrate(unittest.TestCase):
+    def test_parse_supported_baudrates(self) -> None:
+        self.assertEqual(
+            parse_supported_baudrates("+IPR: (0,9600,115200,921600),()\nOK"),
+            [9600, 115200, 921600],
+        )
+        self.assertEqual(
+            parse_supported_baudrates("+IPR: (9600-460800)\nOK"),
+            [9600, 19200, 38400, 57600, 115200, 230400, 460800],
+        )
+        self.assertEqual(parse_supported_baudrates("ERROR"), [])
+
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_fast_baudrate_switches_and_restores(
+        self, mock_send_at_command, mock_serial
+    ) -> None:
+        modem = FakeBaudrateModem("+IPR: (0,9600,115200,460800,921600),()")
+        mock_send_at_command.side_effect = modem
+        with fast_baudrate("COM1", 115200) as rate:
+            self.assertEqual(rate, 921600)
+            self.assertEqual(modem.rate, 921600)
+        self.assertEqual((modem.rate, modem.setting), (115200, 115200))
+
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_fast_baudrate_falls_back(self, mock_send_at_command, mock_serial) -> None:
+        modem = FakeBaudrateModem(
+            "+IPR: (0,9600,115200,460800,921600),()", broken=[921600]
+        )
+        mock_send_at_command.side_effect = modem
+        with fast_baudrate("COM1", 115200) as rate:
+            self.assertEqual(rate, 460800)
+        self.assertEqual((modem.rate, modem.setting), (115200, 115200))
+
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_fast_baudrate_module_lost(self, mock_send_at_command, mock_serial) -> None:
+        def lost_modem(port, command, timeout=60, baudrate=115200) -> str:
+            # Accepts the switch to 921600, then answers at no rate at all.
+            if baudrate != 115200 or command == "AT":
+                return ""
+            if command == "AT+IPR?":
+                return "+IPR: 115200\nOK"
+            if command == "AT+IPR=?":
+                return "+IPR: (0,115200,921600),()\nOK"
+            return "OK" if command == "AT+IPR=921600" else ""
+
+        mock_send_at_command.side_effect = lost_modem
+        with self.assertRaises(serial.SerialException):
+            with fast_baudrate("COM1", 115200):
+                self.fail("The collection must not run against a lost module")
+
+    @patch("sierra_status.src.usb_handle.serial.Serial")
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_fast_baudrate_skips_rates_the_host_cannot_set(
+        self, mock_send_at_command, mock_serial
+    ) -> None:
+        def open_port(port, baudrate, **kwargs):
+            if baudrate == 921600:
+                raise serial.SerialException("SetCommState failed")
+            return MagicMock()
+
+        mock_serial.side_effect = open_port
+        modem = FakeBaudrateModem("+IPR: (0,9600,115200,460800,921600),()")
+        mock_send_at_command.side_effect = modem
+        with fast_baudrate("COM1", 115200) as rate:
+            self.assertEqual(rate, 460800)
+        sent = [call.args[1] for call in mock_send_at_command.call_args_list]
+        self.assertNotIn("AT+IPR=921600", sent)
+        self.assertEqual((modem.rate, modem.setting), (115200, 115200))
+
+    @patch("sierra_status.src.usb_handle.send_at_command")
+    def test_fast_baudrate_unsupported(self, mock_send_at_command) -> None:
+        mock_send_at_command.return_value = "ERROR"
+        with fast_baudrate("COM1", 115200) as rate:
+            self.assertEqual(rate, 115200)
+        self.assertEqual(mock_send_at_command.call_count, 2)
+
+    @patch("sierra_status.src.usb_handle.fast_baudrate")
+    @patch("sierra_status.src.usb_handle.get_module_status")
+    @patch("sierra_status.src.usb_handle.creat_status_file")
+    def test_start_process_negotiate_baudrate(
+        self, mock_creat_status_file, mock_get_module_status, mock_fast_baudrate
+    ) -> None:
+        mock_fast_baudrate.return_value.__enter__.return_value = 921600
+        mock_get_module_status.return_value = "Test Status"
+        start_process("COM1", "hl78xx", logging.INFO, 0, negotiate_baudrate=True)
+        mock_fast_baudrate.assert_called_once_with("COM1", 115200)
+        mock_get_module_status.assert_called_once_with("COM1", 0, "hl78xx", 921600)
+
+
 class TestGetEmCopsAdvanced(unittest.TestCase):
     @patch("sierra_status.src.usb_handle.send_at_command")
     def test_get_em_cops_timeout(self, mock_send_at_command) -> None: